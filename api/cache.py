@@ -0,0 +1,20 @@
+import uuid
+
+from django.core.cache import cache
+
+
+def version_key(namespace):
+    return f'response-version:{namespace}'
+
+
+def new_version():
+    # A random version never repeats, so an evicted counter cannot resurrect stale responses
+    return uuid.uuid4().hex
+
+
+def cache_version(namespace):
+    return cache.get_or_set(version_key(namespace), new_version, timeout=None)
+
+
+def bump_cache_version(*namespaces):
+    cache.set_many({version_key(namespace): new_version() for namespace in namespaces}, timeout=None)
@@ -1,6 +1,9 @@
 from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.response import Response
 from rest_framework import status
+from .cache import cache_version
 
 
 def staff_required(view_func):
@@ -11,3 +14,29 @@ def staff_required(view_func):
         return Response({"error": "Staff access required"}, status=status.HTTP_403_FORBIDDEN)
 
     return wrapper
+
+
+def cached_response(namespace):
+    """Cache successful GET responses under the namespace's current version; bump_cache_version invalidates them.
+
+    Staff and everyone else are cached apart, since views may show staff more. A RESPONSE_CACHE_TIMEOUT of 0
+    turns caching off.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or settings.RESPONSE_CACHE_TIMEOUT <= 0:
+                return view_func(request, *args, **kwargs)
+            audience = 'staff' if request.user.is_staff else 'public'
+            key = f'response:{namespace}:{cache_version(namespace)}:{audience}:{request.get_full_path()}'
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
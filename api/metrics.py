@@ -0,0 +1,150 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.decorators import api_view
+
+from courses.judge.cache import cache_stats
+from .decorators import staff_required
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.responses = {}
+
+
+class Registry:
+    """In-process per-route aggregates; every worker process keeps and exports its own."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, method, status_code, seconds, queries, sql_seconds):
+        with self.lock:
+            metrics = self.routes.setdefault((route, method), RouteMetrics())
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(queries)
+            metrics.sql_seconds += sql_seconds
+            metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def render(self):
+        lines = [
+            '# HELP ucode_request_duration_seconds Request latency by route.',
+            '# TYPE ucode_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            routes = sorted(self.routes.items())
+            for (route, method), metrics in routes:
+                lines.extend(metrics.latency.samples('ucode_request_duration_seconds', labels(route, method)))
+            lines += [
+                '# HELP ucode_request_queries SQL queries per request by route.',
+                '# TYPE ucode_request_queries histogram',
+            ]
+            for (route, method), metrics in routes:
+                lines.extend(metrics.queries.samples('ucode_request_queries', labels(route, method)))
+            lines += [
+                '# HELP ucode_request_sql_seconds_total Time spent in SQL by route.',
+                '# TYPE ucode_request_sql_seconds_total counter',
+            ]
+            lines += [f'ucode_request_sql_seconds_total{{{labels(route, method)}}} {metrics.sql_seconds}'
+                      for (route, method), metrics in routes]
+            lines += [
+                '# HELP ucode_responses_total Responses by route and status code.',
+                '# TYPE ucode_responses_total counter',
+            ]
+            lines += [f'ucode_responses_total{{{labels(route, method)},status="{status_code}"}} {count}'
+                      for (route, method), metrics in routes
+                      for status_code, count in sorted(metrics.responses.items())]
+        judge = cache_stats()
+        lines += [
+            '# HELP ucode_judge_cache_requests_total Judge result cache lookups.',
+            '# TYPE ucode_judge_cache_requests_total counter',
+            f'ucode_judge_cache_requests_total{{result="hit"}} {judge["hits"]}',
+            f'ucode_judge_cache_requests_total{{result="miss"}} {judge["misses"]}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def labels(route, method):
+    route = route.replace('\\', '\\\\').replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Records latency, SQL query count and SQL time of every request under its URL pattern."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        route = '/' + match.route if match is not None else UNMATCHED_ROUTE
+        registry.record(route, request.method, response.status_code, time.perf_counter() - started,
+                        recorder.count, recorder.seconds)
+        return response
+
+
+@api_view(['GET'])
+@staff_required
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
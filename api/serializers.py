@@ -1,15 +1,28 @@
+import json
 import requests
 import cloudinary.uploader
 from django.utils import timezone
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
-from django.db.models import Sum
+from django.db import models
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework_simplejwt.tokens import RefreshToken
 from user.models import CustomUser, UserLesson, UserCourse
 from courses.models import (
     Course, Lesson, Component, Video, Text, MultipleChoiceQuestion, MultipleOptionsQuestion, CodingQuestion,
-    MultipleChoiceOption, MultipleOptionsOption, CodingTest, Certificate
+    MultipleChoiceOption, MultipleOptionsOption, CodingTest, Certificate, SearchEntry
 )
+from courses.loaders import COMPONENT_PREFETCHES, load_component_children
+
+
+class DynamicFieldsMixin:
+    """Accepts fields=[...] to keep only the named fields of the serializer."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class UserCourseSerializer(serializers.ModelSerializer):
@@ -22,12 +35,12 @@ class UserCourseSerializer(serializers.ModelSerializer):
 
 class CourseSerializer(serializers.ModelSerializer):
     time_since_creation = serializers.SerializerMethodField()
-    total_score = serializers.SerializerMethodField()
     user_courses = UserCourseSerializer(source='usercourse_set', many=True, read_only=True)
 
     class Meta:
         model = Course
         fields = '__all__'
+        read_only_fields = ('total_score', 'lesson_count', 'learner_count', 'content_version', 'content_updated_at')
 
     def get_time_since_creation(self, obj):
         delta = timezone.now() - obj.created_at
@@ -36,8 +49,35 @@ class CourseSerializer(serializers.ModelSerializer):
         years = days // 365
         return {'days': days, 'months': months, 'years': years}
 
-    def get_total_score(self, obj):
-        return obj.lessons.aggregate(total=Sum('max_score'))['total'] or 0
+
+class CourseCatalogSerializer(CourseSerializer):
+    user_courses = None
+    completed_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Course
+        exclude = ('learners',)
+
+
+class EnrolledCourseDetailsSerializer(CourseCatalogSerializer):
+    completed_count = None
+
+
+class EnrolledCourseSerializer(serializers.ModelSerializer):
+    """Dashboard entry: the course fields plus the caller's own enrollment state, flattened.
+
+    Expects a UserCourse with select_related('course') and a next_lesson_id annotation.
+    """
+    next_lesson_id = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = UserCourse
+        fields = ('progress', 'percentage', 'is_completed', 'is_vip', 'enrolled_at', 'next_lesson_id')
+
+    def to_representation(self, instance):
+        data = EnrolledCourseDetailsSerializer(instance.course).data
+        data.update(super().to_representation(instance))
+        return data
 
 
 class UserLessonSerializer(serializers.ModelSerializer):
@@ -104,6 +144,25 @@ class CodingQuestionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+COMPONENT_SERIALIZERS = {
+    'video': VideoSerializer,
+    'text': TextSerializer,
+    'mcq': MultipleChoiceQuestionSerializer,
+    'moq': MultipleOptionsQuestionSerializer,
+    'coding': CodingQuestionSerializer,
+}
+
+
+class ComponentListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        components = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        children = self.context.setdefault('component_children', {})
+        missing = [component for component in components if component.id not in children]
+        if missing:
+            children.update(load_component_children(missing))
+        return super().to_representation(components)
+
+
 # Component Serializer with custom logic
 class ComponentSerializer(serializers.ModelSerializer):
     data = serializers.SerializerMethodField()
@@ -111,42 +170,164 @@ class ComponentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Component
         fields = ('id', 'lesson', 'type', 'max_score', 'serial_number', 'data')
+        list_serializer_class = ComponentListSerializer
 
     def get_data(self, obj):
-        type_map = {
-            'video': Video,
-            'text': Text,
-            'mcq': MultipleChoiceQuestion,
-            'moq': MultipleOptionsQuestion,
-            'coding': CodingQuestion,
-        }
-        child_model = type_map.get(obj.type)
-        if child_model:
-            try:
-                child_instance = child_model.objects.get(id=obj.id)
-                if isinstance(child_instance, Video):
-                    return VideoSerializer(child_instance).data
-                elif isinstance(child_instance, Text):
-                    return TextSerializer(child_instance).data
-                elif isinstance(child_instance, MultipleChoiceQuestion):
-                    return MultipleChoiceQuestionSerializer(child_instance).data
-                elif isinstance(child_instance, MultipleOptionsQuestion):
-                    return MultipleOptionsQuestionSerializer(child_instance).data
-                elif isinstance(child_instance, CodingQuestion):
-                    return CodingQuestionSerializer(child_instance).data
-            except child_model.DoesNotExist:
-                return {}
-        return {}
+        child_serializer = COMPONENT_SERIALIZERS.get(obj.type)
+        if child_serializer is None:
+            return {}
+        children = self.context.get('component_children')
+        if children is None or obj.id not in children:
+            children = load_component_children([obj])
+        child_instance = children.get(obj.id)
+        if child_instance is None:
+            return {}
+        return child_serializer(child_instance).data
+
+
+def prefetch_lessons(lessons, learner=None):
+    """Prefetch everything LessonSerializer reads and return the component children for its context.
+
+    With a learner, the per-learner relations (students, user_lessons) only contain that learner's own rows.
+    """
+    students = CustomUser.objects.all()
+    user_lessons = UserLesson.objects.select_related('lesson__course')
+    if learner is not None:
+        students = students.filter(id=learner.id)
+        user_lessons = user_lessons.filter(user=learner)
+    prefetch_related_objects(
+        lessons,
+        'components',
+        Prefetch('students', queryset=students),
+        Prefetch('userlesson_set', queryset=user_lessons),
+    )
+    components = [component for lesson in lessons for component in lesson.components.all()]
+    prefetches = dict(COMPONENT_PREFETCHES, coding=(
+        'tests', Prefetch('students', queryset=students), Prefetch('student', queryset=students)))
+    return load_component_children(components, prefetches)
+
+
+class LessonListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        lessons = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        children = prefetch_lessons(lessons, self.context.get('learner'))
+        self.context.setdefault('component_children', {}).update(children)
+        return super().to_representation(lessons)
 
 
 # Lesson Serializer
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user_lessons = UserLessonSerializer(source='userlesson_set', many=True, read_only=True)
     components = ComponentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Lesson
         fields = '__all__'
+        list_serializer_class = LessonListSerializer
+
+
+class LessonSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Lesson list entry without component bodies; expects a component_count annotation.
+
+    The caller's own score and completion are read from the UserCourse passed as context['user_course'].
+    """
+    component_count = serializers.IntegerField(read_only=True)
+    score = serializers.SerializerMethodField()
+    is_completed = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lesson
+        fields = ('id', 'title', 'serial_number', 'max_score', 'component_count', 'score', 'is_completed')
+
+    def get_score(self, obj):
+        user_course = self.context.get('user_course')
+        return None if user_course is None else user_course.lesson_scores.get(str(obj.id))
+
+    def get_is_completed(self, obj):
+        user_course = self.context.get('user_course')
+        return user_course is not None and obj.id in user_course.completed_lessons
+
+
+# Lesson builder payload serializers
+class OptionPayloadSerializer(serializers.Serializer):
+    option = serializers.CharField(trim_whitespace=False)
+    is_correct = serializers.BooleanField(default=False)
+
+
+class CodingTestPayloadSerializer(serializers.Serializer):
+    input = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None,
+                                  trim_whitespace=False)
+    output = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
+
+class ComponentPayloadSerializer(serializers.Serializer):
+    REQUIRED_FIELDS = {
+        'video': ('video_url',),
+        'text': ('content',),
+        'mcq': ('question', 'options'),
+        'moq': ('question', 'options'),
+        'coding': ('question', 'language', 'tests'),
+    }
+
+    id = serializers.IntegerField(required=False)
+    type = serializers.ChoiceField(choices=Component.TYPE_CHOICES)
+    max_score = serializers.IntegerField(min_value=0)
+    serial_number = serializers.IntegerField(min_value=0)
+    video_url = serializers.URLField(required=False)
+    content = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    question = serializers.CharField(required=False, trim_whitespace=False)
+    language = serializers.ChoiceField(choices=CodingQuestion.LANGUAGE_CHOICES, required=False)
+    pre_written_code = serializers.CharField(required=False, allow_blank=True, allow_null=True, trim_whitespace=False)
+    options = OptionPayloadSerializer(many=True, required=False)
+    tests = CodingTestPayloadSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        missing = [field for field in self.REQUIRED_FIELDS[attrs['type']] if field not in attrs]
+        if missing:
+            raise serializers.ValidationError({field: 'This field is required.' for field in missing})
+        return attrs
+
+
+class LessonPayloadSerializer(serializers.Serializer):
+    course_id = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), source='course')
+    title = serializers.CharField(max_length=250)
+    serial_number = serializers.IntegerField(min_value=0)
+    max_score = serializers.IntegerField(min_value=0, max_value=100)
+    components = serializers.JSONField()
+
+    def validate_components(self, value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise serializers.ValidationError('Value must be valid JSON.')
+        components = ComponentPayloadSerializer(data=value, many=True)
+        components.is_valid(raise_exception=True)
+        return components.validated_data
+
+
+class LessonPatchSerializer(LessonPayloadSerializer):
+    """Partial lesson update; components without an id are new, stored ones left out are deleted."""
+    course_id = None
+
+    def validate_components(self, value):
+        components = super().validate_components(value)
+        ids = [component['id'] for component in components if 'id' in component]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Component ids must be unique.')
+        unknown = set(ids) - set(self.context['lesson'].components.values_list('id', flat=True))
+        if unknown:
+            raise serializers.ValidationError(f'Components {sorted(unknown)} do not belong to this lesson.')
+        return components
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    course_name = serializers.CharField(source='course.name', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchEntry
+        fields = ('kind', 'course', 'course_name', 'lesson', 'title', 'rank')
 
 
 class CustomUserWithLessonsSerializer(serializers.ModelSerializer):
@@ -5,7 +5,8 @@ from user.views import SignupView, CustomTokenObtainPairView, GoogleAuthView, Lo
 from courses.views import (
     courses_index, courses_create, courses_details, lessons_details, lessons_start, task_check, courses_lessons,
     lessons_next, lessons_create, courses_delete, lessons_delete, GenerateCertificateView, courses_update,
-    verify_certificate, courses_publish, courses_unpublish
+    verify_certificate, courses_publish, courses_unpublish, courses_enrollments, judge_stats,
+    task_check_status, lessons_patch, courses_search
 )
 
 urlpatterns = [
@@ -17,6 +18,7 @@ urlpatterns = [
     path('courses/', courses_index),
     path('courses/<int:course_id>/', courses_details),
     path('courses/<int:course_id>/lessons/', courses_lessons),
+    path('courses/<int:course_id>/enrollments/', courses_enrollments),
     path('courses/<int:course_id>/next-lesson/<int:serial_number>/', lessons_next),
     path('courses/delete/<int:course_id>/', courses_delete),
     path('courses/update/<int:course_id>/', courses_update),
@@ -25,11 +27,15 @@ urlpatterns = [
     path('courses/unpublish/<int:course_id>/', courses_unpublish),
     path('courses/create/', courses_create),
     path('courses/enrolled/', user_courses),
+    path('search/', courses_search),
     path('lessons/<int:lesson_id>/', lessons_details),
     path('lessons/<int:lesson_id>/start/', lessons_start),
     path('lessons/delete/<int:lesson_id>/', lessons_delete),
     path('lessons/create/', lessons_create),
+    path('lessons/update/<int:lesson_id>/', lessons_patch),
     path('task-check/<int:component_id>/', task_check),
+    path('task-check/jobs/<int:job_id>/', task_check_status),
+    path('judge/stats/', judge_stats),
     path('profile/edit/', user_update),
     path('verify-certificate/<str:certificate_id>/', verify_certificate),
     path('statistics/', statistics),
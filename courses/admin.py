@@ -1,14 +1,54 @@
 from django.contrib import admin
+from api.cache import bump_cache_version
+from user.models import UserCourse
 from .models import *
 
-admin.site.register(Course)
-admin.site.register(Lesson)
-admin.site.register(Video)
-admin.site.register(Text)
-admin.site.register(MultipleChoiceQuestion)
-admin.site.register(MultipleOptionsQuestion)
-admin.site.register(CodingQuestion)
-admin.site.register(MultipleChoiceOption)
-admin.site.register(MultipleOptionsOption)
-admin.site.register(CodingTest)
+
+def content_course(obj):
+    """The course whose content an admin edit of obj changes."""
+    if isinstance(obj, Lesson):
+        return obj.course
+    if isinstance(obj, Component):
+        return obj.lesson.course
+    return obj.question.lesson.course
+
+
+class ContentAdmin(admin.ModelAdmin):
+    """Admin edits refresh the course's aggregates, content version and search entries like the API's writes."""
+
+    def refresh_courses(self, courses):
+        course_ids = {course.id for course in courses}
+        Course.objects.filter(id__in=course_ids).recompute_aggregates()
+        UserCourse.objects.filter(course_id__in=course_ids).recompute_progress()
+        for course in Course.objects.filter(id__in=course_ids):
+            course.touch_content()
+        bump_cache_version('catalog')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.refresh_courses([obj if isinstance(obj, Course) else content_course(obj)])
+
+    def delete_model(self, request, obj):
+        courses = [] if isinstance(obj, Course) else [content_course(obj)]
+        super().delete_model(request, obj)
+        self.refresh_courses(courses)
+
+    def delete_queryset(self, request, queryset):
+        courses = [] if queryset.model is Course else [content_course(obj) for obj in queryset]
+        super().delete_queryset(request, queryset)
+        self.refresh_courses(courses)
+
+
+admin.site.register(Course, ContentAdmin)
+admin.site.register(Lesson, ContentAdmin)
+admin.site.register(Video, ContentAdmin)
+admin.site.register(Text, ContentAdmin)
+admin.site.register(MultipleChoiceQuestion, ContentAdmin)
+admin.site.register(MultipleOptionsQuestion, ContentAdmin)
+admin.site.register(CodingQuestion, ContentAdmin)
+admin.site.register(MultipleChoiceOption, ContentAdmin)
+admin.site.register(MultipleOptionsOption, ContentAdmin)
+admin.site.register(CodingTest, ContentAdmin)
 admin.site.register(Certificate)
+admin.site.register(GradingJob)
+admin.site.register(SiteStatistics)
@@ -0,0 +1,188 @@
+import json
+import math
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+
+import django
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.models import CustomUser, UserCourse, UserLesson
+from .models import Course, Lesson, Component, Certificate, GradingJob
+
+SERVER_NAME = 'localhost'
+
+
+@dataclass
+class Scenario:
+    """One request against api/urls.py; path and data are formatted with the benchmark context."""
+    name: str
+    method: str
+    path: str
+    audience: str = 'learner'
+    data: dict = field(default_factory=dict)
+
+
+SCENARIOS = [
+    Scenario('signup', 'post', '/api/signup/', 'anonymous',
+             {'username': 'bench_signup_{iteration}', 'email': 'bench_signup_{iteration}@example.com',
+              'first_name': 'Bench', 'last_name': 'Mark', 'password': 'benchmark'}),
+    Scenario('login', 'post', '/api/login/', 'anonymous', {'username': '{learner}', 'password': 'benchmark'}),
+    Scenario('token_refresh', 'post', '/api/token/refresh/', 'anonymous', {'refresh': '{refresh}'}),
+    Scenario('logout', 'post', '/api/logout/', 'learner', {'refresh': '{refresh}'}),
+    Scenario('courses_index', 'get', '/api/courses/', 'anonymous'),
+    Scenario('courses_index_staff', 'get', '/api/courses/?complexity=junior', 'staff'),
+    Scenario('courses_details', 'get', '/api/courses/{course}/'),
+    Scenario('courses_lessons', 'get', '/api/courses/{course}/lessons/'),
+    Scenario('courses_lessons_expanded', 'get', '/api/courses/{course}/lessons/?expand=components'),
+    Scenario('courses_enrollments', 'get', '/api/courses/{course}/enrollments/', 'staff'),
+    Scenario('lessons_next', 'get', '/api/courses/{course}/next-lesson/1/'),
+    Scenario('courses_delete', 'delete', '/api/courses/delete/{course}/', 'staff'),
+    Scenario('courses_update_get', 'get', '/api/courses/update/{course}/', 'staff'),
+    Scenario('courses_update_put', 'put', '/api/courses/update/{course}/', 'staff',
+             {'name': 'Benchmark course renamed', 'complexity': 'junior', 'description': 'Renamed'}),
+    Scenario('courses_publish', 'post', '/api/courses/publish/{course}/', 'staff'),
+    Scenario('courses_unpublish', 'post', '/api/courses/unpublish/{course}/', 'staff'),
+    Scenario('courses_create', 'post', '/api/courses/create/', 'staff',
+             {'name': 'Benchmark course new', 'complexity': 'junior', 'description': 'New'}),
+    Scenario('user_courses', 'get', '/api/courses/enrolled/'),
+    Scenario('search', 'get', '/api/search/?q=recursion', 'anonymous'),
+    Scenario('lessons_details', 'get', '/api/lessons/{lesson}/'),
+    Scenario('lessons_start', 'post', '/api/lessons/{next_lesson}/start/'),
+    Scenario('lessons_delete', 'delete', '/api/lessons/delete/{lesson}/', 'staff'),
+    Scenario('lessons_create', 'post', '/api/lessons/create/', 'staff',
+             {'course_id': '{course}', 'title': 'Benchmark lesson', 'serial_number': 99, 'max_score': 100,
+              'components': '[{{"type": "text", "max_score": 100, "serial_number": 1, "content": "Text"}}]'}),
+    Scenario('lessons_patch', 'patch', '/api/lessons/update/{lesson}/', 'staff', {'title': 'Renamed lesson'}),
+    Scenario('task_check_mcq', 'post', '/api/task-check/{mcq}/', 'learner', {'answer': 'true'}),
+    Scenario('task_check_coding', 'post', '/api/task-check/{coding}/', 'learner', {'answer': 'print(input())'}),
+    Scenario('task_check_status', 'get', '/api/task-check/jobs/{job}/'),
+    Scenario('judge_stats', 'get', '/api/judge/stats/', 'staff'),
+    Scenario('user_update', 'put', '/api/profile/edit/', 'learner',
+             {'username': '{learner}', 'email': '{learner}@example.com', 'first_name': 'Bench',
+              'last_name': 'Mark'}),
+    Scenario('verify_certificate', 'get', '/api/verify-certificate/{certificate}/', 'anonymous'),
+    Scenario('statistics', 'get', '/api/statistics/', 'anonymous'),
+    Scenario('metrics', 'get', '/metrics', 'staff'),
+]
+# Left out: google-auth calls Google and the certificate PDF is rendered by WeasyPrint and stored remotely
+
+
+def benchmark_context(learner):
+    """Pick the objects the scenarios act on and create the rows they need; call inside a rolled back atomic."""
+    user_course = UserCourse.objects.filter(user=learner, course__is_published=True, course__lesson_count__gt=1) \
+        .select_related('course').order_by('course_id').first()
+    if user_course is None:
+        raise ValueError('The learner has no published course with lessons; run seed_benchmark_data first')
+    course = user_course.course
+    lessons = list(Lesson.objects.filter(course=course).order_by('serial_number'))
+    client = APIClient(SERVER_NAME=SERVER_NAME)
+    client.force_authenticate(learner)
+    client.post(f'/api/lessons/{lessons[0].id}/start/')
+    components = {component.type: component.id for component in Component.objects.filter(lesson=lessons[0])}
+    job = GradingJob.objects.create(user=learner, component_id=components['coding'], source_code='print(1)')
+    certificate = Certificate.objects.create(student=learner, course=course,
+                                             certificate_id=f'benchmark-{learner.id}-{course.id}')
+    started = set(UserLesson.objects.filter(user=learner, lesson__in=lessons).values_list('lesson_id', flat=True))
+    next_lesson = next((lesson for lesson in lessons if lesson.id not in started), lessons[-1])
+    return {
+        'learner': learner.username, 'refresh': str(RefreshToken.for_user(learner)), 'course': course.id,
+        'lesson': lessons[0].id, 'next_lesson': next_lesson.id, 'mcq': components['mcq'],
+        'coding': components['coding'], 'job': job.id, 'certificate': certificate.certificate_id,
+    }
+
+
+def format_value(value, context):
+    if isinstance(value, str):
+        return value.format(**context)
+    return value
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def run_scenario(scenario, clients, context, iterations):
+    timings, queries, statuses = [], [], set()
+    for iteration in range(iterations + 1):
+        context = dict(context, iteration=iteration)
+        path = scenario.path.format(**context)
+        data = {key: format_value(value, context) for key, value in scenario.data.items()}
+        client = clients[scenario.audience]
+        # Every request runs in a savepoint that is rolled back, so writes never pile up between iterations
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, scenario.method)(path, data, format='json' if data else None)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if iteration == 0:
+            continue  # warm-up
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    return {
+        'method': scenario.method.upper(),
+        'path': scenario.path,
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': statistics.median_low(queries),
+    }
+
+
+def run_benchmarks(learner_username='bench_1', staff_username='bench_0', iterations=20, only=None):
+    learner = CustomUser.objects.get(username=learner_username)
+    staff = CustomUser.objects.get(username=staff_username)
+    clients = {audience: APIClient(SERVER_NAME=SERVER_NAME) for audience in ('anonymous', 'learner', 'staff')}
+    clients['learner'].force_authenticate(learner)
+    clients['staff'].force_authenticate(staff)
+    results = {}
+    # Response caching off, so every timed request reaches its view and the database instead of the entry the
+    # warm-up stored; the shared cache itself is left alone
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0), transaction.atomic():
+        context = benchmark_context(learner)
+        for scenario in SCENARIOS:
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = run_scenario(scenario, clients, context, iterations)
+        transaction.set_rollback(True)
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'iterations': iterations,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'courses': Course.objects.count(),
+            'lessons': Lesson.objects.count(),
+            'components': Component.objects.count(),
+            'users': CustomUser.objects.count(),
+        },
+        'endpoints': results,
+    }
+
+
+def compare(previous, current):
+    """Yield one line per endpoint with the p95 and query count change from a previous run."""
+    for name, result in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if before is None:
+            yield f'{name:28} new'
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        yield (f'{name:28} p95 {before["p95_ms"]:9.2f} -> {result["p95_ms"]:9.2f} ms ({change:+6.1f}%)  '
+               f'queries {before["queries"]:3} -> {result["queries"]:3}')
+
+
+def dump(report, stream):
+    json.dump(report, stream, indent=2)
+    stream.write('\n')
@@ -0,0 +1,173 @@
+from collections import defaultdict
+
+from django.db import connections, router
+
+from django.db.models import OuterRef, Subquery
+
+from user.models import UserComponent
+from .loaders import load_component_children
+from .models import (
+    COMPONENT_MODELS, Component, MultipleChoiceOption, MultipleOptionsOption, CodingTest
+)
+
+# Subtype columns copied from a validated component payload
+CHILD_FIELDS = {
+    'video': ('video_url',),
+    'text': ('content',),
+    'mcq': ('question',),
+    'moq': ('question',),
+    'coding': ('question', 'language', 'pre_written_code'),
+}
+OPTION_MODELS = {
+    'mcq': MultipleChoiceOption,
+    'moq': MultipleOptionsOption,
+}
+# Only the content rows are needed to diff a lesson, not the learner M2Ms
+CONTENT_PREFETCHES = {
+    'mcq': ('options',),
+    'moq': ('options',),
+    'coding': ('tests',),
+}
+
+
+def insert_children(child_model, children):
+    """Bulk insert multi-table-inheritance child rows whose Component parents already exist.
+
+    bulk_create() refuses inherited models, so this writes only the child table, batched like bulk_create.
+    """
+    using = router.db_for_write(child_model)
+    fields = child_model._meta.local_concrete_fields
+    batch_size = connections[using].ops.bulk_batch_size(fields, children) or len(children)
+    for start in range(0, len(children), batch_size):
+        child_model._base_manager._insert(children[start:start + batch_size], fields=fields, using=using, raw=True)
+
+
+def insert_components(lesson, components):
+    """Insert validated component payloads with one query per table, not per row."""
+    parents = Component.objects.bulk_create([
+        Component(lesson=lesson, type=component['type'], max_score=component['max_score'],
+                  serial_number=component['serial_number'])
+        for component in components
+    ])
+
+    children = defaultdict(list)
+    options = defaultdict(list)
+    tests = []
+    for parent, component in zip(parents, components):
+        component_type = component['type']
+        child_model = COMPONENT_MODELS[component_type]
+        child = child_model(component_ptr_id=parent.id, **{
+            field: component.get(field) for field in CHILD_FIELDS[component_type]})
+        children[child_model].append(child)
+        if component_type in OPTION_MODELS:
+            option_model = OPTION_MODELS[component_type]
+            options[option_model].extend(
+                option_model(question_id=parent.id, option=option['option'], is_correct=option['is_correct'])
+                for option in component['options'])
+        elif component_type == 'coding':
+            tests.extend(CodingTest(question_id=parent.id, input=test['input'], output=test['output'])
+                         for test in component['tests'])
+
+    for child_model, rows in children.items():
+        insert_children(child_model, rows)
+    for option_model, rows in options.items():
+        option_model.objects.bulk_create(rows)
+    CodingTest.objects.bulk_create(tests)
+    return parents
+
+
+def stored_rows(component_type, child):
+    if component_type in OPTION_MODELS:
+        return [(option.option, option.is_correct) for option in child.options.all()]
+    if component_type == 'coding':
+        return [(test.input, test.output) for test in child.tests.all()]
+    return None
+
+
+def payload_rows(component):
+    if component['type'] in OPTION_MODELS:
+        return [(option['option'], option['is_correct']) for option in component['options']]
+    if component['type'] == 'coding':
+        return [(test['input'], test['output']) for test in component['tests']]
+    return None
+
+
+def patch_components(lesson, components):
+    """Bring the lesson's components in line with a validated payload, writing only what differs.
+
+    Payload entries with an id update that component in place, entries without one are inserted and stored
+    components missing from the payload are deleted. A component whose type changes is replaced. Learners'
+    full marks on a kept component follow its new max_score; lesson scores are left to rescore_lesson().
+    """
+    stored = {component.id: component for component in lesson.components.all()}
+    children = load_component_children(stored.values(), prefetches=CONTENT_PREFETCHES)
+
+    kept = {}
+    inserts = []
+    for component in components:
+        current = stored.get(component.get('id'))
+        if current is not None and current.type == component['type']:
+            kept[current.id] = component
+        else:
+            inserts.append(component)
+    deleted = [component_id for component_id in stored if component_id not in kept]
+
+    updated_count = 0
+    changed_parents = []
+    rescored = []
+    changed_children = defaultdict(list)
+    replaced_rows = defaultdict(list)
+    for component_id, component in kept.items():
+        parent = stored[component_id]
+        child = children[component_id]
+        component_type = component['type']
+        updated = False
+        if parent.max_score != component['max_score']:
+            rescored.append(component_id)
+        if (parent.max_score, parent.serial_number) != (component['max_score'], component['serial_number']):
+            parent.max_score = component['max_score']
+            parent.serial_number = component['serial_number']
+            changed_parents.append(parent)
+            updated = True
+        fields = CHILD_FIELDS[component_type]
+        if any(getattr(child, field) != component.get(field) for field in fields):
+            for field in fields:
+                setattr(child, field, component.get(field))
+            changed_children[component_type].append(child)
+            updated = True
+        if stored_rows(component_type, child) != payload_rows(component):
+            replaced_rows[component_type].append(component)
+            updated = True
+        updated_count += updated
+
+    if deleted:
+        Component.objects.filter(id__in=deleted).delete()
+    if changed_parents:
+        Component.objects.bulk_update(changed_parents, ['max_score', 'serial_number'])
+    if rescored:
+        # Answers are scored all or nothing, so any points mean full marks
+        UserComponent.objects.filter(component_id__in=rescored, score__gt=0).update(
+            score=Subquery(Component.objects.filter(id=OuterRef('component_id')).values('max_score')))
+    for component_type, rows in changed_children.items():
+        COMPONENT_MODELS[component_type].objects.bulk_update(rows, CHILD_FIELDS[component_type])
+    for component_type, rows in replaced_rows.items():
+        question_ids = [component['id'] for component in rows]
+        if component_type in OPTION_MODELS:
+            option_model = OPTION_MODELS[component_type]
+            option_model.objects.filter(question_id__in=question_ids).delete()
+            option_model.objects.bulk_create(
+                option_model(question_id=component['id'], option=option['option'], is_correct=option['is_correct'])
+                for component in rows for option in component['options'])
+        else:
+            CodingTest.objects.filter(question_id__in=question_ids).delete()
+            CodingTest.objects.bulk_create(
+                CodingTest(question_id=component['id'], input=test['input'], output=test['output'])
+                for component in rows for test in component['tests'])
+    if inserts:
+        insert_components(lesson, inserts)
+
+    return {
+        'created': len(inserts),
+        'updated': updated_count,
+        'deleted': len(deleted),
+    }
@@ -0,0 +1,152 @@
+import base64
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timezone
+from functools import lru_cache
+from io import BytesIO
+
+import django
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import get_template
+from weasyprint import HTML, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+
+TEMPLATE_NAME = 'certificate_template.html'
+
+
+@lru_cache(maxsize=None)
+def template_version():
+    source = get_template(TEMPLATE_NAME).template.source
+    return hashlib.sha256(source.encode()).hexdigest()[:12]
+
+
+def certificate_path(certificate):
+    return f'certificates/{certificate.certificate_id}-{template_version()}.pdf'
+
+
+def certificate_etag(certificate):
+    return f'"{certificate.certificate_id}-{template_version()}"'
+
+
+def certificate_last_modified(certificate):
+    return datetime.combine(certificate.issue_date, time.min, tzinfo=timezone.utc).timestamp()
+
+
+def qr_code_base64(data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="darkblue", back_color="white")
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+
+def certificate_context(certificate):
+    student = certificate.student
+    course = certificate.course
+    return {
+        'recipient_name': student.get_full_name() or student.username,
+        'course_name': course.name,
+        'issue_date': certificate.issue_date.strftime('%B %d, %Y'),
+        'certificate_id': certificate.certificate_id,
+        'verification_data': (f'Sertifikat {student.get_full_name()}ga {course.name} kursini muvaffaqiyatli '
+                              f'yakunlaganu uchun {certificate.issue_date} sanasida berildi'),
+    }
+
+
+class RendererState:
+    """WeasyPrint state kept warm for every render in the current process."""
+
+    def __init__(self):
+        self.font_config = FontConfiguration()
+        self.resources = {}
+        self.images = {}
+        self.template = get_template(TEMPLATE_NAME)
+
+    def fetch_url(self, url):
+        # Fonts, stylesheets and the background image are the same for every certificate
+        if url not in self.resources:
+            resource = default_url_fetcher(url)
+            if 'file_obj' in resource:
+                resource['string'] = resource.pop('file_obj').read()
+            self.resources[url] = resource
+        return dict(self.resources[url])
+
+
+_state = None
+
+
+def renderer_state():
+    global _state
+    if _state is None:
+        _state = RendererState()
+    return _state
+
+
+def init_render_worker():
+    django.setup()
+    renderer_state()
+
+
+def render_certificate(context, base_url):
+    state = renderer_state()
+    context = dict(context, qr_code=qr_code_base64(context['verification_data']))
+    html_string = state.template.render(context)
+    # Generate PDF, respecting the template's @page settings
+    return HTML(string=html_string, base_url=base_url, url_fetcher=state.fetch_url).write_pdf(
+        stylesheets=[],
+        presentational_hints=True,
+        font_config=state.font_config,
+        cache=state.images,
+        margin_left=0,
+        margin_right=0,
+        margin_top=0,
+        margin_bottom=0
+    )
+
+
+class CertificateRenderer:
+    """Renders certificates in a pool of worker processes that keep WeasyPrint state loaded."""
+
+    def __init__(self, workers=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_render_worker)
+
+    def submit(self, certificate):
+        return self.pool.submit(render_certificate, certificate_context(certificate), settings.BASE_URL)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def store_certificate_pdf(certificate, pdf):
+    path = certificate_path(certificate)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(pdf))
+    return path
+
+
+def get_certificate_pdf(certificate, base_url=None):
+    """Return the storage path of the certificate PDF, rendering it only the first time."""
+    path = certificate_path(certificate)
+    if not default_storage.exists(path):
+        pdf = render_certificate(certificate_context(certificate), base_url or settings.BASE_URL)
+        store_certificate_pdf(certificate, pdf)
+    return path
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def code_executor_check(app_configs, **kwargs):
+    if settings.CODE_EXECUTOR == 'local' and not settings.DEBUG:
+        return [Error('CODE_EXECUTOR=local runs submissions without a sandbox and is only allowed with DEBUG on.',
+                      hint='Use CODE_EXECUTOR=judge0 in production.', id='courses.E001')]
+    return []
+
+
+@register()
+def response_cache_check(app_configs, **kwargs):
+    # Version bumps only reach the process that made them when every worker keeps its own cache
+    if settings.RESPONSE_CACHE_TIMEOUT > 0 and not settings.DEBUG and isinstance(caches['default'], LocMemCache):
+        return [Error('RESPONSE_CACHE_TIMEOUT is set but the default cache is per-process, so workers would serve '
+                      'stale catalog and statistics responses.',
+                      hint='Point CACHE_BACKEND at a shared cache such as Redis, or set RESPONSE_CACHE_TIMEOUT=0.',
+                      id='courses.E002')]
+    return []
@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from user.models import UserLesson, UserComponent, UserCourse
+from .judge import JudgeError
+from .models import CodingQuestion, Component, GradingJob
+from .utils import run_tests
+
+# Components whose points are awarded when the lesson starts rather than by grading
+FREE_COMPONENT_TYPES = ('video', 'text')
+MAX_ATTEMPTS = 3
+# Seconds before the first retry of a job the judge failed; doubles with every further attempt
+RETRY_DELAY = 5
+
+
+def apply_score(user, component, is_correct):
+    """Record a graded answer and roll it up into the lesson and course in one transaction.
+
+    component must come with lesson__course loaded. The learner's UserCourse and UserLesson rows are locked
+    so parallel answers from the same learner are applied one after another.
+    """
+    lesson = component.lesson
+    score = component.max_score if is_correct else 0
+    with transaction.atomic():
+        user_course = UserCourse.objects.select_for_update().get(user=user, course_id=lesson.course_id)
+        user_lesson = UserLesson.objects.select_for_update().get(user=user, lesson=lesson)
+        user_component, created = UserComponent.objects.get_or_create(user=user, component=component,
+                                                                      defaults={'score': score})
+        previous_score = 0 if created else user_component.score
+        if previous_score != score:
+            UserComponent.objects.filter(id=user_component.id).update(score=score)
+        lesson_score = max(user_lesson.score - previous_score + score, 0)
+        is_completed = lesson_score >= 80
+        if lesson_score != user_lesson.score or is_completed != user_lesson.is_completed:
+            UserLesson.objects.filter(id=user_lesson.id).update(score=lesson_score, is_completed=is_completed)
+            user_course.record_lesson(lesson, lesson_score, is_completed)
+        elif created or previous_score != score:
+            user_course.save(update_fields=['updated_at'])
+
+
+def rescore_lesson(lesson):
+    """Recompute every learner's score and completion of the lesson from its current components.
+
+    Call after components were added, removed or rescored, then recompute_progress() for the course.
+    """
+    components = Component.objects.filter(lesson=lesson)
+    free_score = components.filter(type__in=FREE_COMPONENT_TYPES).aggregate(total=Sum('max_score'))['total'] or 0
+    graded = UserComponent.objects.filter(user=OuterRef('user'), component__lesson=lesson) \
+        .exclude(component__type__in=FREE_COMPONENT_TYPES).order_by().values('user')
+    score = Coalesce(Subquery(graded.annotate(total=Sum('score')).values('total')), Value(0)) + free_score
+    return UserLesson.objects.filter(lesson=lesson).update(
+        score=score, is_completed=Case(When(GreaterThanOrEqual(score, 80), then=Value(True)), default=Value(False)))
+
+
+def claim_job():
+    while True:
+        job_id = GradingJob.objects.filter(status=GradingJob.PENDING, available_at__lte=timezone.now()) \
+            .order_by('created_at', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        claimed = GradingJob.objects.filter(id=job_id, status=GradingJob.PENDING).update(
+            status=GradingJob.RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1)
+        if claimed:
+            return GradingJob.objects.select_related('user').get(id=job_id)
+
+
+def requeue_stale_jobs(stale_after):
+    """Requeue jobs whose worker died mid-run; ones that already used every attempt are failed instead."""
+    now = timezone.now()
+    stale = GradingJob.objects.filter(status=GradingJob.RUNNING, started_at__lt=now - timedelta(seconds=stale_after))
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(status=GradingJob.FAILED, finished_at=now,
+                                                    error='Worker stopped while grading')
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(status=GradingJob.PENDING, available_at=now)
+
+
+def run_job(job):
+    question = CodingQuestion.objects.select_related('lesson__course').get(id=job.component_id)
+    try:
+        passed = run_tests(job.source_code, question.tests.all(), question.language)
+    except JudgeError as e:
+        job.error = str(e)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = GradingJob.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = GradingJob.PENDING
+            job.available_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+        job.save(update_fields=['status', 'error', 'finished_at', 'available_at'])
+        return job
+    apply_score(job.user, question, passed)
+    job.is_correct = passed
+    job.status = GradingJob.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'is_correct', 'finished_at'])
+    return job
+
+
+def work(poll_interval=1.0, stale_after=300, stop=None, burst=False):
+    processed = 0
+    while not (stop and stop.is_set()):
+        close_old_connections()
+        requeue_stale_jobs(stale_after)
+        job = claim_job()
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        try:
+            run_job(job)
+        except Exception as e:
+            GradingJob.objects.filter(id=job.id).update(status=GradingJob.FAILED, error=str(e),
+                                                        finished_at=timezone.now())
+        processed += 1
+    close_old_connections()
+    return processed
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .base import BaseExecutor, JudgeError
+from .cache import CachingExecutor
+
+EXECUTORS = {
+    'judge0': 'courses.judge.judge0.Judge0Client',
+    'local': 'courses.judge.local.LocalExecutor',
+}
+
+
+def get_executor():
+    executor = import_string(EXECUTORS.get(settings.CODE_EXECUTOR, settings.CODE_EXECUTOR))()
+    if settings.JUDGE_CACHE_ENABLED:
+        executor = CachingExecutor(executor)
+    return executor
@@ -0,0 +1,8 @@
+class JudgeError(Exception):
+    pass
+
+
+class BaseExecutor:
+    def run_tests(self, source_code, language, tests):
+        """Return True if the program prints each test's expected output for its input."""
+        raise NotImplementedError
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.core.cache import caches
+
+from .base import BaseExecutor
+
+HITS_KEY = 'judge-cache:hits'
+MISSES_KEY = 'judge-cache:misses'
+
+
+def sha256(text):
+    return hashlib.sha256((text or '').encode()).hexdigest()
+
+
+def result_key(source_code, language, tests):
+    tests_hash = sha256('\0'.join(sorted(f'{sha256(test.input)}:{sha256(test.output)}' for test in tests)))
+    return f'judge-result:{language}:{sha256(source_code)}:{tests_hash}'
+
+
+def increment(cache, key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats(cache_alias='judge'):
+    cache = caches[cache_alias]
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else 0}
+
+
+class CachingExecutor(BaseExecutor):
+    """Remembers pass/fail per (language, source, tests) so identical submissions skip the judge.
+
+    Only definite verdicts are stored; a JudgeError propagates and the next identical submission asks again.
+    """
+
+    def __init__(self, executor, cache_alias='judge'):
+        self.executor = executor
+        self.cache = caches[cache_alias]
+
+    def run_tests(self, source_code, language, tests):
+        tests = list(tests)
+        key = result_key(source_code, language, tests)
+        passed = self.cache.get(key)
+        if passed is not None:
+            increment(self.cache, HITS_KEY)
+            return passed
+        increment(self.cache, MISSES_KEY)
+        passed = self.executor.run_tests(source_code, language, tests)
+        if isinstance(passed, bool):
+            self.cache.set(key, passed)
+        return passed
@@ -0,0 +1,197 @@
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .judge0 import IN_QUEUE, PROCESSING, ACCEPTED
+
+RUNTIME_ERROR = 11
+INTERNAL_ERROR = 13
+STATUS_DESCRIPTIONS = {
+    IN_QUEUE: 'In Queue',
+    PROCESSING: 'Processing',
+    ACCEPTED: 'Accepted',
+    RUNTIME_ERROR: 'Runtime Error (NZEC)',
+    INTERNAL_ERROR: 'Internal Error',
+}
+PYTHON_LANGUAGE_ID = 71
+
+
+class FakeJudge0Server:
+    """Local stand-in for the Judge0 submission endpoints used by Judge0Client.
+
+    Only Python submissions are executed, with the interpreter running this server. Each submission takes at
+    least latency plus up to jitter seconds, and at most workers of them run at once while the rest queue.
+    Submissions beyond queue_limit waiting ones are refused with 429, and failure_rate of all requests fail
+    with 503, as a busy Judge0 does.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, workers=4, jitter=0.0, queue_limit=None,
+                 failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.submissions = {}
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ('submitted', 'completed', 'rejected', 'failed_requests', 'queued', 'running', 'peak_queued',
+             'peak_running'), 0)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, workers=self.workers)
+
+    def count(self, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+            self.counters['peak_queued'] = max(self.counters['peak_queued'], self.counters['queued'])
+            self.counters['peak_running'] = max(self.counters['peak_running'], self.counters['running'])
+
+    def should_fail(self):
+        with self.lock:
+            failed = self.failure_rate and self.random.random() < self.failure_rate
+        if failed:
+            self.count(failed_requests=1)
+        return failed
+
+    def accepts(self, count):
+        with self.lock:
+            accepted = self.queue_limit is None or self.counters['queued'] + count <= self.queue_limit
+        if not accepted:
+            self.count(rejected=count)
+        return accepted
+
+    def submit(self, payload):
+        token = str(uuid.uuid4())
+        with self.lock:
+            self.submissions[token] = {'token': token, 'stdout': None, 'stderr': None, 'status_id': IN_QUEUE}
+        self.count(submitted=1, queued=1)
+        self.executor.submit(self.execute, token, payload)
+        return token
+
+    def execute(self, token, payload):
+        started = time.monotonic()
+        self.count(queued=-1, running=1)
+        try:
+            self.run(token, payload, started)
+        finally:
+            self.count(running=-1, completed=1)
+
+    def run(self, token, payload, started):
+        self.update(token, status_id=PROCESSING)
+        if payload.get('language_id') != PYTHON_LANGUAGE_ID:
+            result = {'status_id': INTERNAL_ERROR, 'stderr': 'Language is not supported by the fake judge'}
+        else:
+            completed = subprocess.run([sys.executable, '-c', payload.get('source_code', '')],
+                                       input=payload.get('stdin', ''), capture_output=True, text=True, timeout=10)
+            result = {
+                'status_id': ACCEPTED if completed.returncode == 0 else RUNTIME_ERROR,
+                'stdout': completed.stdout or None,
+                'stderr': completed.stderr or None,
+            }
+        with self.lock:
+            latency = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        remaining = latency - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        self.update(token, **result)
+
+    def update(self, token, **fields):
+        with self.lock:
+            self.submissions[token].update(fields)
+
+    def result(self, token):
+        with self.lock:
+            submission = dict(self.submissions[token])
+        status_id = submission.pop('status_id')
+        submission['status'] = {'id': status_id, 'description': STATUS_DESCRIPTIONS[status_id]}
+        return submission
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, data, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_json(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_POST(self):
+                path = urlparse(self.path).path.rstrip('/')
+                if path not in ('/submissions/batch', '/submissions'):
+                    self.send_json({'error': 'Not found'}, 404)
+                    return
+                payload = self.read_json()
+                if server.should_fail():
+                    self.send_json({'error': 'Service unavailable'}, 503)
+                    return
+                submissions = payload.get('submissions', []) if path == '/submissions/batch' else [payload]
+                if not server.accepts(len(submissions)):
+                    self.send_json({'error': 'Too many submissions in queue'}, 429)
+                elif path == '/submissions/batch':
+                    self.send_json([{'token': server.submit(submission)} for submission in submissions], 201)
+                else:
+                    self.send_json({'token': server.submit(payload)}, 201)
+
+            def do_GET(self):
+                if server.should_fail():
+                    self.send_json({'error': 'Service unavailable'}, 503)
+                    return
+                url = urlparse(self.path)
+                path = url.path.rstrip('/')
+                try:
+                    if path == '/submissions/batch':
+                        tokens = parse_qs(url.query).get('tokens', [''])[0].split(',')
+                        self.send_json({'submissions': [server.result(token) for token in tokens if token]})
+                    elif path.startswith('/submissions/'):
+                        self.send_json(server.result(path.rsplit('/', 1)[1]))
+                    else:
+                        self.send_json({'error': 'Not found'}, 404)
+                except KeyError:
+                    self.send_json({'error': 'Submission not found'}, 404)
+
+        return Handler
@@ -0,0 +1,120 @@
+import time
+
+import requests
+from django.conf import settings
+
+from .base import BaseExecutor, JudgeError
+
+language_codes = {
+    'python': 71,
+    'javascript': 93,
+    'c++': 54,
+    'c': 50,
+    'java': 62
+}
+
+# Judge0 status ids: 1 and 2 mean the submission has not finished yet, 3 means it ran successfully
+IN_QUEUE = 1
+PROCESSING = 2
+ACCEPTED = 3
+# 4-12 are verdicts on the submission: Wrong Answer, Time Limit Exceeded, Compilation Error and the Runtime
+# Errors. 13 (Internal Error) and later mean the judge itself failed, so there is no verdict
+LAST_RUNTIME_ERROR = 12
+# Judge0 rejects batches larger than its MAX_SUBMISSION_BATCH_SIZE, which defaults to 20
+BATCH_SIZE = 20
+
+
+class Judge0Client(BaseExecutor):
+    def __init__(self, base_url=None, api_key=None, host=None, timeout=None, session=None):
+        self.base_url = (base_url or settings.JUDGE0_URL).rstrip('/')
+        self.api_key = api_key if api_key is not None else settings.JUDGE0_API_KEY
+        self.host = host if host is not None else settings.JUDGE0_HOST
+        self.timeout = timeout or settings.JUDGE0_TIMEOUT
+        self.session = session or requests.Session()
+        self.initial_delay = 0.1
+        self.max_delay = 2
+        self.backoff = 1.5
+
+    @property
+    def headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["x-rapidapi-key"] = self.api_key
+        if self.host:
+            headers["x-rapidapi-host"] = self.host
+        return headers
+
+    def request(self, method, path, **kwargs):
+        if self.host and not self.api_key:
+            raise JudgeError(f'JUDGE0_API_KEY is not set; it is required by {self.host}')
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', headers=self.headers,
+                                            timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise JudgeError(f'Judge0 request failed: {e}') from e
+
+    def submit_batch(self, submissions):
+        tokens = []
+        for start in range(0, len(submissions), BATCH_SIZE):
+            created = self.request('POST', '/submissions/batch', params={"base64_encoded": "false"},
+                                   json={"submissions": submissions[start:start + BATCH_SIZE]})
+            for submission in created:
+                if 'token' not in submission:
+                    raise JudgeError(f'Judge0 rejected a submission: {submission}')
+                tokens.append(submission['token'])
+        return tokens
+
+    def fetch_batch(self, tokens):
+        results = []
+        for start in range(0, len(tokens), BATCH_SIZE):
+            data = self.request('GET', '/submissions/batch', params={
+                "tokens": ','.join(tokens[start:start + BATCH_SIZE]),
+                "base64_encoded": "false",
+                "fields": "token,stdout,stderr,status",
+            })
+            if not isinstance(data, dict) or not isinstance(data.get('submissions'), list):
+                raise JudgeError(f'Judge0 returned no submissions: {data}')
+            results.extend(data['submissions'])
+        return results
+
+    def run_tests(self, source_code, language, tests):
+        """Run every test in one batch and return True only if all of them pass.
+
+        Polling stops as soon as one finished test fails. Judge-side failures raise JudgeError instead of failing
+        the learner.
+        """
+        tests = list(tests)
+        if not tests:
+            return True
+        submissions = [
+            {
+                "language_id": language_codes[language],
+                "source_code": source_code,
+                "stdin": f'{test.input}\n' if test.input else '',
+            }
+            for test in tests
+        ]
+        tokens = self.submit_batch(submissions)
+        expected = {token: f'{test.output}\n' for token, test in zip(tokens, tests)}
+
+        deadline = time.monotonic() + self.timeout
+        delay = self.initial_delay
+        while expected:
+            time.sleep(delay)
+            for result in self.fetch_batch(list(expected)):
+                if not result or result.get('token') not in expected:
+                    raise JudgeError(f'Judge0 returned an unknown submission: {result}')
+                status_id = (result.get('status') or {}).get('id')
+                if status_id in (IN_QUEUE, PROCESSING):
+                    continue
+                if not isinstance(status_id, int) or status_id > LAST_RUNTIME_ERROR:
+                    raise JudgeError(f'Judge0 could not run the submission: {result.get("status")}')
+                if status_id != ACCEPTED or result.get('stdout') != expected[result['token']]:
+                    return False
+                del expected[result['token']]
+            if expected and time.monotonic() >= deadline:
+                raise JudgeError(f'Judge0 did not finish {len(expected)} test(s) in {self.timeout}s')
+            delay = min(delay * self.backoff, self.max_delay)
+        return True
@@ -0,0 +1,94 @@
+import os
+import pwd
+import signal
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+
+from .base import BaseExecutor, JudgeError
+
+# Source file name, optional compile command and run command per language; {memory} is the limit in MB
+LANGUAGES = {
+    'python': ('main.py', None, [sys.executable, '-I', '-S', 'main.py']),
+    'javascript': ('main.js', None, ['node', 'main.js']),
+    'c': ('main.c', ['gcc', '-O2', '-o', 'main', 'main.c', '-lm'], ['./main']),
+    'c++': ('main.cpp', ['g++', '-O2', '-o', 'main', 'main.cpp'], ['./main']),
+    'java': ('Main.java', ['javac', 'Main.java'], ['java', '-Xmx{memory}m', '-cp', '.', 'Main']),
+}
+# Runtimes that reserve far more virtual memory than they use and fail under RLIMIT_AS
+UNBOUNDED_ADDRESS_SPACE = ('javascript', 'java')
+MAX_OUTPUT_BYTES = 1024 * 1024
+COMPILE_TIME_LIMIT = 10
+SANDBOX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox.py')
+
+
+class LocalExecutor(BaseExecutor):
+    """Runs submissions in a temporary directory with CPU, memory, process and wall-clock limits.
+
+    This is not an isolation boundary: nothing keeps a submission off the network or out of readable files, so
+    it is refused unless DEBUG is on. Set LOCAL_EXECUTOR_USER to run submissions as a separate unprivileged
+    user (the worker then has to run as root to switch to it).
+    """
+
+    def __init__(self, time_limit=None, memory_limit=None, max_processes=None, user=None):
+        if not settings.DEBUG:
+            raise JudgeError('The local executor does not sandbox submissions and only runs with DEBUG on')
+        self.time_limit = time_limit or settings.LOCAL_EXECUTOR_TIME_LIMIT
+        self.memory_limit = memory_limit or settings.LOCAL_EXECUTOR_MEMORY_LIMIT
+        self.max_processes = max_processes or settings.LOCAL_EXECUTOR_MAX_PROCESSES
+        user = user if user is not None else settings.LOCAL_EXECUTOR_USER
+        self.user = pwd.getpwnam(user) if user else None
+
+    def execute(self, command, workdir, language, stdin='', compiling=False):
+        command = [part.format(memory=self.memory_limit) for part in command]
+        if compiling:
+            cpu_seconds, memory_bytes = COMPILE_TIME_LIMIT, 0
+        else:
+            cpu_seconds = self.time_limit
+            memory_bytes = 0 if language in UNBOUNDED_ADDRESS_SPACE else self.memory_limit * 1024 * 1024
+        sandboxed = [sys.executable, '-I', '-S', SANDBOX, str(cpu_seconds), str(memory_bytes),
+                     str(self.max_processes), str(MAX_OUTPUT_BYTES), '--', *command]
+        credentials = {'user': self.user.pw_uid, 'group': self.user.pw_gid, 'extra_groups': []} if self.user else {}
+        try:
+            process = subprocess.Popen(sandboxed, cwd=workdir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, text=True, start_new_session=True,
+                                       env={'PATH': os.environ.get('PATH', ''), 'HOME': workdir}, **credentials)
+        except OSError as e:
+            raise JudgeError(f'Cannot run {language} locally: {e}') from e
+        try:
+            stdout, stderr = process.communicate(stdin, timeout=cpu_seconds * 2)
+        except subprocess.TimeoutExpired:
+            stdout = None
+        finally:
+            # The submission leads its own session; kill the whole group so no child outlives the run
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if stdout is None:
+            process.communicate()
+            return None
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def run_tests(self, source_code, language, tests):
+        tests = list(tests)
+        if not tests:
+            return True
+        filename, compile_command, run_command = LANGUAGES[language]
+        with tempfile.TemporaryDirectory(prefix='ucode-judge-') as workdir:
+            with open(os.path.join(workdir, filename), 'w') as source_file:
+                source_file.write(source_code)
+            if self.user:
+                for path in (workdir, os.path.join(workdir, filename)):
+                    os.chown(path, self.user.pw_uid, self.user.pw_gid)
+            if compile_command:
+                compiled = self.execute(compile_command, workdir, language, compiling=True)
+                if compiled is None or compiled.returncode != 0:
+                    return False
+            for test in tests:
+                completed = self.execute(run_command, workdir, language, f'{test.input}\n' if test.input else '')
+                if completed is None or completed.returncode != 0 or completed.stdout != f'{test.output}\n':
+                    return False
+        return True
@@ -0,0 +1,29 @@
+"""Apply resource limits to this process, then replace it with the submission.
+
+LocalExecutor starts submissions through this script instead of a preexec_fn, which is not safe in the threaded
+web and grading workers:
+
+    python sandbox.py CPU_SECONDS MEMORY_BYTES PROCESSES OUTPUT_BYTES -- command [args...]
+
+A MEMORY_BYTES of 0 leaves the address space unlimited. Only the standard library is used, so it runs under
+python -I -S as the unprivileged submission user.
+"""
+import os
+import resource
+import sys
+
+
+def main(argv):
+    cpu_seconds, memory_bytes, processes, output_bytes = (int(value) for value in argv[:4])
+    command = argv[5:]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes, output_bytes))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (processes, processes))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    os.execvp(command[0], command)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
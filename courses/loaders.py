@@ -0,0 +1,28 @@
+from collections import defaultdict
+
+from .models import COMPONENT_MODELS
+
+# Related tables to prefetch alongside each component subtype
+COMPONENT_PREFETCHES = {
+    'mcq': ('options',),
+    'moq': ('options',),
+    'coding': ('tests', 'students', 'student'),
+}
+
+
+def load_component_children(components, prefetches=COMPONENT_PREFETCHES):
+    """Return {component_id: child instance} using one query per subtype plus its prefetches."""
+    ids_by_type = defaultdict(list)
+    for component in components:
+        ids_by_type[component.type].append(component.id)
+
+    children = {}
+    for component_type, ids in ids_by_type.items():
+        child_model = COMPONENT_MODELS.get(component_type)
+        if child_model is None:
+            continue
+        queryset = child_model.objects.filter(id__in=ids).prefetch_related(
+            *prefetches.get(component_type, ()))
+        for child in queryset:
+            children[child.id] = child
+    return children
@@ -0,0 +1,186 @@
+import statistics
+import threading
+import time
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from user.models import CustomUser, UserCourse, UserLesson
+from .benchmark import SERVER_NAME, percentile
+from .builders import insert_components
+from .grading import work
+from .judge.fake import FakeJudge0Server
+from .models import Course, Lesson, CodingQuestion, GradingJob
+
+COURSE_NAME = 'Load test course'
+USER_PREFIX = 'loadtest_'
+SOURCE_CODE = 'print(input())'
+
+
+def create_fixture(learners, tests):
+    """Create a course with one coding question and learners who have started its lesson."""
+    remove_fixture()
+    with transaction.atomic():
+        course = Course.objects.create(name=COURSE_NAME, complexity='junior', description='Grading load test',
+                                       is_published=True)
+        lesson = Lesson.objects.create(course=course, title='Lesson 1', max_score=100, serial_number=1)
+        insert_components(lesson, [{
+            'type': 'coding', 'max_score': 100, 'serial_number': 1, 'question': 'Echo the input',
+            'language': 'python', 'pre_written_code': None,
+            'tests': [{'input': str(n), 'output': str(n)} for n in range(tests)],
+        }])
+        Course.objects.filter(id=course.id).recompute_aggregates()
+        password = make_password(None)
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'{USER_PREFIX}{n}', email=f'{USER_PREFIX}{n}@example.com', password=password)
+            for n in range(learners)
+        ])
+        users = list(CustomUser.objects.filter(username__startswith=USER_PREFIX).order_by('id'))
+        UserCourse.objects.bulk_create([UserCourse(user=user, course=course) for user in users])
+        UserLesson.objects.bulk_create([UserLesson(user=user, lesson=lesson) for user in users])
+    return CodingQuestion.objects.get(lesson=lesson), users
+
+
+def remove_fixture():
+    with transaction.atomic():
+        CustomUser.objects.filter(username__startswith=USER_PREFIX).delete()
+        Course.objects.filter(name=COURSE_NAME).delete()
+
+
+def submit_all(question, users, submissions, concurrency):
+    """POST submissions coding answers to task_check from concurrency threads; return (status, seconds) pairs."""
+    numbers = iter(range(submissions))
+    lock = threading.Lock()
+    results = [None] * submissions
+
+    def submit():
+        clients = {}
+        try:
+            while True:
+                with lock:
+                    n = next(numbers, None)
+                if n is None:
+                    return
+                user = users[n % len(users)]
+                if user.id not in clients:
+                    clients[user.id] = APIClient(raise_request_exception=False, SERVER_NAME=SERVER_NAME)
+                    clients[user.id].force_authenticate(user)
+                # A trailing comment makes every source distinct, so no two submissions share a judge result
+                started = time.perf_counter()
+                response = clients[user.id].post(f'/api/task-check/{question.id}/',
+                                                 {'answer': f'{SOURCE_CODE}  # {n}'}, format='json')
+                results[n] = (response.status_code, time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=submit) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_load_test(submissions=200, concurrency=20, grading_threads=4, learners=20, tests=3, latency=0.5,
+                  jitter=0.5, judge_workers=4, queue_limit=None, failure_rate=0.0, seed=None, timeout=300,
+                  sample_interval=0.05):
+    """Grade coding submissions against a local FakeJudge0Server and report how the pipeline held up.
+
+    Learners POST to task_check from concurrency threads while grading_threads run courses.grading.work(), all
+    in this process. Submission latency, job latency (created to finished), throughput, the share of time the
+    grading threads were busy and the judge's queue depth are reported. The fixture is removed afterwards.
+    """
+    question, users = create_fixture(learners, tests)
+    stop = threading.Event()
+    samples = []
+    try:
+        with FakeJudge0Server(latency=latency, jitter=jitter, workers=judge_workers, queue_limit=queue_limit,
+                              failure_rate=failure_rate, seed=seed) as server, \
+                override_settings(CODE_EXECUTOR='judge0', JUDGE0_URL=server.url, JUDGE0_API_KEY='', JUDGE0_HOST='',
+                                  JUDGE_CACHE_ENABLED=False):
+            def grade():
+                try:
+                    work(poll_interval=sample_interval, stop=stop)
+                finally:
+                    connection.close()
+
+            def sample():
+                try:
+                    while not stop.wait(sample_interval):
+                        jobs = GradingJob.objects.filter(component_id=question.id)
+                        samples.append((jobs.filter(status=GradingJob.RUNNING).count(), server.stats()['queued']))
+                finally:
+                    connection.close()
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=grade, daemon=True) for _ in range(grading_threads)]
+            threads.append(threading.Thread(target=sample, daemon=True))
+            for thread in threads:
+                thread.start()
+            submitted = submit_all(question, users, submissions, concurrency)
+            deadline = time.monotonic() + timeout
+            unfinished = GradingJob.objects.filter(component_id=question.id,
+                                                   status__in=(GradingJob.PENDING, GradingJob.RUNNING))
+            while unfinished.exists() and time.monotonic() < deadline:
+                time.sleep(sample_interval)
+            wall = time.perf_counter() - started
+            stop.set()
+            for thread in threads:
+                thread.join()
+            judge = server.stats()
+        return report(question, submitted, samples, wall, grading_threads, judge, {
+            'submissions': submissions, 'concurrency': concurrency, 'grading_threads': grading_threads,
+            'learners': learners, 'tests': tests, 'latency': latency, 'jitter': jitter,
+            'judge_workers': judge_workers, 'queue_limit': queue_limit, 'failure_rate': failure_rate,
+        })
+    finally:
+        stop.set()
+        remove_fixture()
+
+
+def report(question, submitted, samples, wall, grading_threads, judge, options):
+    jobs = list(GradingJob.objects.filter(component_id=question.id)
+                .values('status', 'attempts', 'created_at', 'finished_at'))
+    submit_ms = [seconds * 1000 for _, seconds in submitted]
+    job_seconds = [(job['finished_at'] - job['created_at']).total_seconds()
+                   for job in jobs if job['status'] == GradingJob.DONE]
+    busy = [running for running, _ in samples] or [0]
+    queued = [depth for _, depth in samples] or [0]
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            **options,
+        },
+        'submit': {
+            'accepted': sum(1 for status_code, _ in submitted if status_code == 202),
+            'errors': sum(1 for status_code, _ in submitted if status_code != 202),
+            'p50_ms': round(percentile(submit_ms, 50), 3),
+            'p95_ms': round(percentile(submit_ms, 95), 3),
+            'p99_ms': round(percentile(submit_ms, 99), 3),
+        },
+        'jobs': {
+            'done': len(job_seconds),
+            'failed': sum(1 for job in jobs if job['status'] == GradingJob.FAILED),
+            'unfinished': sum(1 for job in jobs if job['status'] in (GradingJob.PENDING, GradingJob.RUNNING)),
+            'retried': sum(1 for job in jobs if job['attempts'] > 1),
+            'wall_s': round(wall, 3),
+            'throughput_per_s': round(len(job_seconds) / wall, 3) if wall else 0,
+            'p50_s': round(percentile(job_seconds, 50), 3) if job_seconds else None,
+            'p95_s': round(percentile(job_seconds, 95), 3) if job_seconds else None,
+            'p99_s': round(percentile(job_seconds, 99), 3) if job_seconds else None,
+            'max_s': round(max(job_seconds), 3) if job_seconds else None,
+        },
+        'workers': {
+            'threads': grading_threads,
+            'mean_busy': round(statistics.fmean(busy), 3),
+            'peak_busy': max(busy),
+            'saturation': round(statistics.fmean(busy) / grading_threads, 3),
+        },
+        'judge': dict(judge, mean_queued=round(statistics.fmean(queued), 3)),
+    }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.transfer import export_course
+
+
+class Command(BaseCommand):
+    help = 'Stream a course with its lessons, components, options and coding tests as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('--output', '-o', default='-', help='File to write to (defaults to stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f'Course {options["course_id"]} does not exist')
+
+        if options['output'] == '-':
+            count = export_course(course, self.stdout)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                count = export_course(course, stream)
+        self.stderr.write(self.style.SUCCESS(f'Exported {count} record(s) of course {course.id}'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.judge.fake import FakeJudge0Server
+
+
+class Command(BaseCommand):
+    help = 'Serve a local fake Judge0 until interrupted; point JUDGE0_URL at it to grade without the real judge'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=2358)
+        parser.add_argument('--latency', type=float, default=0.0, help='Minimum seconds each submission takes')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random seconds added to the latency')
+        parser.add_argument('--workers', type=int, default=4, help='Submissions run concurrently')
+        parser.add_argument('--queue-limit', type=int, help='Refuse submissions with 429 beyond this many queued')
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Share of requests answered with 503')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        server = FakeJudge0Server(options['host'], options['port'], options['latency'], options['workers'],
+                                  options['jitter'], options['queue_limit'], options['failure_rate'],
+                                  options['seed'])
+        with server:
+            self.stdout.write(self.style.SUCCESS(f'Fake Judge0 listening on {server.url}'))
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write(f'Stats: {server.stats()}')
@@ -0,0 +1,35 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from courses.grading import work
+
+
+class Command(BaseCommand):
+    help = 'Run queued coding grading jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1, help='Jobs graded concurrently by this process')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Requeue running jobs that started more than this many seconds ago')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        processed = []
+
+        def run():
+            processed.append(work(options['poll_interval'], options['stale_after'], stop, options['burst']))
+
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(f'Graded {sum(processed)} job(s)'))
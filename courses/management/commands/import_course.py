@@ -0,0 +1,29 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_cache_version
+from courses.transfer import TransferError, import_course
+
+
+class Command(BaseCommand):
+    help = 'Create a course from an export_course NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read from, or - for stdin')
+        parser.add_argument('--name', help='Name for the new course instead of the exported one')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            if options['path'] == '-':
+                course = import_course(sys.stdin, options['name'])
+            else:
+                with open(options['path'], encoding='utf-8') as stream:
+                    course = import_course(stream, options['name'])
+        except (OSError, TransferError) as e:
+            raise CommandError(str(e))
+        bump_cache_version('catalog', 'statistics')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported course {course.id} ({course.lesson_count} lesson(s)) in {time.monotonic() - started:.2f}s'))
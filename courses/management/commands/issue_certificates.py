@@ -0,0 +1,56 @@
+import time
+import uuid
+from concurrent.futures import as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_cache_version
+from courses.certificates import CertificateRenderer, certificate_path, store_certificate_pdf
+from courses.models import Course, Certificate, SiteStatistics
+from user.models import UserCourse
+
+
+class Command(BaseCommand):
+    help = 'Issue and render certificates for every learner who completed a course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('--workers', type=int, default=None, help='Renderer processes (defaults to CPU count)')
+        parser.add_argument('--force', action='store_true', help='Re-render certificates that are already stored')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f'Course {options["course_id"]} does not exist')
+
+        completed = list(UserCourse.objects.filter(course=course, is_completed=True).values_list('user_id', flat=True))
+        issued = set(Certificate.objects.filter(course=course).values_list('student_id', flat=True))
+        new_certificates = Certificate.objects.bulk_create([
+            Certificate(student_id=user_id, course=course, certificate_id=str(uuid.uuid4()))
+            for user_id in completed if user_id not in issued
+        ])
+        if new_certificates:
+            SiteStatistics.adjust(certificates_count=len(new_certificates))
+            bump_cache_version('statistics')
+        self.stdout.write(f'Issued {len(new_certificates)} new certificate(s)')
+
+        certificates = [
+            certificate for certificate in
+            Certificate.objects.filter(course=course, student_id__in=completed).select_related('student', 'course')
+            if options['force'] or not default_storage.exists(certificate_path(certificate))
+        ]
+        if not certificates:
+            self.stdout.write(self.style.SUCCESS('All certificates are already rendered'))
+            return
+
+        started = time.monotonic()
+        with CertificateRenderer(options['workers']) as renderer:
+            futures = {renderer.submit(certificate): certificate for certificate in certificates}
+            for future in as_completed(futures):
+                store_certificate_pdf(futures[future], future.result())
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(certificates)} certificate(s) in {elapsed:.2f}s '
+            f'({len(certificates) / elapsed:.2f} certificates/second)'))
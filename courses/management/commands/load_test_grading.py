@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.benchmark import dump
+from courses.loadtest import run_load_test
+
+
+class Command(BaseCommand):
+    help = ('Drive concurrent coding submissions through task_check and the grading workers against a local '
+            'fake Judge0, and report throughput, worker saturation and tail latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20, help='Threads posting submissions')
+        parser.add_argument('--grading-threads', type=int, default=4, help='Threads running the grading worker')
+        parser.add_argument('--learners', type=int, default=20)
+        parser.add_argument('--tests', type=int, default=3, help='Tests of the coding question')
+        parser.add_argument('--latency', type=float, default=0.5, help='Minimum seconds the judge takes per test')
+        parser.add_argument('--jitter', type=float, default=0.5, help='Extra random judge seconds per test')
+        parser.add_argument('--judge-workers', type=int, default=4, help='Tests the judge runs concurrently')
+        parser.add_argument('--queue-limit', type=int, help='Judge refuses submissions beyond this many queued')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of judge requests that fail')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--timeout', type=int, default=300, help='Seconds to wait for the queue to drain')
+        parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_load_test(
+                options['submissions'], options['concurrency'], options['grading_threads'], options['learners'],
+                options['tests'], options['latency'], options['jitter'], options['judge_workers'],
+                options['queue_limit'], options['failure_rate'], options['seed'], options['timeout'])
+        except Exception as e:
+            raise CommandError(f'Load test failed: {e}')
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                dump(report, stream)
+        else:
+            dump(report, sys.stdout)
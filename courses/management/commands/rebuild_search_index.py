@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from courses.search import reindex_courses
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search entries of courses, lessons and their components'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Limit the rebuild to these courses')
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids'] or list(Course.objects.values_list('id', flat=True))
+        reindex_courses(course_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search entries for {len(course_ids)} course(s)'))
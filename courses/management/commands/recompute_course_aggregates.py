@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Recompute total_score, lesson_count and learner_count for courses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Limit the recompute to these courses')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['course_ids']:
+            courses = courses.filter(id__in=options['course_ids'])
+        updated = courses.recompute_aggregates()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed aggregates for {updated} course(s)'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from user.models import UserCourse
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized progress of every enrollment from UserLesson rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Limit the rebuild to these courses')
+
+    def handle(self, *args, **options):
+        enrollments = UserCourse.objects.all()
+        if options['course_ids']:
+            enrollments = enrollments.filter(course_id__in=options['course_ids'])
+        updated = enrollments.recompute_progress()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed progress for {updated} enrollment(s)'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_cache_version
+from courses.models import SiteStatistics
+
+
+class Command(BaseCommand):
+    help = 'Recount the site statistics counters from the source tables'
+
+    def handle(self, *args, **options):
+        statistics = SiteStatistics.reconcile()
+        bump_cache_version('statistics')
+        self.stdout.write(self.style.SUCCESS(
+            f'courses={statistics.courses_count} users={statistics.users_count} '
+            f'certificates={statistics.certificates_count}'))
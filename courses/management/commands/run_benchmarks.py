@@ -0,0 +1,35 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.benchmark import SCENARIOS, compare, dump, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time every API endpoint against the seeded benchmark data and report p50/p95 latency and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--learner', default='bench_1', help='Username the learner requests run as')
+        parser.add_argument('--staff', default='bench_0', help='Username the staff requests run as')
+        parser.add_argument('--only', nargs='*', choices=[scenario.name for scenario in SCENARIOS],
+                            help='Run only these scenarios')
+        parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout')
+        parser.add_argument('--compare', help='Earlier JSON report to compare this run with')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_benchmarks(options['learner'], options['staff'], options['iterations'], options['only'])
+        except Exception as e:
+            raise CommandError(f'Benchmark failed: {e}')
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                dump(report, stream)
+        else:
+            dump(report, sys.stdout)
+        if options['compare']:
+            with open(options['compare']) as stream:
+                previous = json.load(stream)
+            for line in compare(previous, report):
+                self.stderr.write(line)
@@ -0,0 +1,101 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import bump_cache_version
+from courses.builders import insert_components
+from courses.models import Course, Lesson, SiteStatistics
+from courses.search import reindex_courses
+from user.models import CustomUser, UserCourse, UserLesson
+
+COURSE_PREFIX = 'Benchmark course'
+USER_PREFIX = 'bench_'
+BENCHMARK_PASSWORD = 'benchmark'
+COMPONENT_TYPES = ('video', 'text', 'mcq', 'moq', 'coding')
+
+
+def component_payload(rng, component_type, serial_number):
+    component = {'type': component_type, 'max_score': 20, 'serial_number': serial_number}
+    if component_type == 'video':
+        component['video_url'] = f'https://example.com/videos/{rng.randrange(10 ** 6)}.mp4'
+    elif component_type == 'text':
+        component['content'] = ' '.join(rng.choice(('loop', 'function', 'variable', 'class', 'list', 'recursion'))
+                                        for _ in range(200))
+    elif component_type in ('mcq', 'moq'):
+        component['question'] = f'Question {serial_number}'
+        component['options'] = [{'option': f'Option {n}', 'is_correct': n == 0} for n in range(4)]
+    else:
+        component.update(question=f'Print the number {serial_number}', language='python', pre_written_code=None,
+                         tests=[{'input': str(n), 'output': str(n)} for n in range(3)])
+    return component
+
+
+class Command(BaseCommand):
+    help = 'Seed a reproducible synthetic dataset for benchmarks (replaces any earlier benchmark data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--lessons', type=int, default=10, help='Lessons per course')
+        parser.add_argument('--components', type=int, default=8, help='Components per lesson')
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--enrollments', type=int, default=5, help='Courses each user is enrolled in')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            Course.objects.filter(name__startswith=COURSE_PREFIX).delete()
+            CustomUser.objects.filter(username__startswith=USER_PREFIX).delete()
+
+            Course.objects.bulk_create([
+                Course(name=f'{COURSE_PREFIX} {n}', complexity=rng.choice(('junior', 'middle', 'senior')),
+                       description=f'Synthetic course {n} for benchmarks', is_published=n % 5 != 0)
+                for n in range(options['courses'])
+            ])
+            course_ids = list(Course.objects.filter(name__startswith=COURSE_PREFIX).order_by('id')
+                              .values_list('id', flat=True))
+            Lesson.objects.bulk_create([
+                Lesson(course_id=course_id, title=f'Lesson {n}', max_score=100, serial_number=n)
+                for course_id in course_ids for n in range(1, options['lessons'] + 1)
+            ])
+            lessons = list(Lesson.objects.filter(course_id__in=course_ids).order_by('course_id', 'serial_number'))
+            for lesson in lessons:
+                insert_components(lesson, [
+                    component_payload(rng, COMPONENT_TYPES[n % len(COMPONENT_TYPES)], n)
+                    for n in range(1, options['components'] + 1)
+                ])
+
+            password = make_password(BENCHMARK_PASSWORD)
+            CustomUser.objects.bulk_create([
+                CustomUser(username=f'{USER_PREFIX}{n}', email=f'{USER_PREFIX}{n}@example.com', password=password,
+                           is_staff=n == 0)
+                for n in range(options['users'])
+            ])
+            user_ids = list(CustomUser.objects.filter(username__startswith=USER_PREFIX).order_by('id')
+                            .values_list('id', flat=True))
+
+            lessons_by_course = {}
+            for lesson in lessons:
+                lessons_by_course.setdefault(lesson.course_id, []).append(lesson)
+            enrollments, user_lessons = [], []
+            for user_id in user_ids:
+                for course_id in rng.sample(course_ids, min(options['enrollments'], len(course_ids))):
+                    enrollments.append(UserCourse(user_id=user_id, course_id=course_id))
+                    for lesson in lessons_by_course[course_id][:rng.randint(0, options['lessons'])]:
+                        score = rng.choice((40, 100))
+                        user_lessons.append(UserLesson(user_id=user_id, lesson=lesson, score=score,
+                                                       is_completed=score >= 80))
+            UserCourse.objects.bulk_create(enrollments, batch_size=1000)
+            UserLesson.objects.bulk_create(user_lessons, batch_size=1000)
+
+            Course.objects.filter(id__in=course_ids).recompute_aggregates()
+            UserCourse.objects.filter(course_id__in=course_ids).recompute_progress()
+            reindex_courses(course_ids)
+            SiteStatistics.reconcile()
+        bump_cache_version('catalog', 'statistics')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(course_ids)} course(s), {len(lessons)} lesson(s), '
+            f'{len(lessons) * options["components"]} component(s), {len(user_ids)} user(s), '
+            f'{len(enrollments)} enrollment(s) and {len(user_lessons)} started lesson(s)'))
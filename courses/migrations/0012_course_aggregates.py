@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:49
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_aggregates(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    UserCourse = apps.get_model('user', 'UserCourse')
+    lessons = Lesson.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    learners = UserCourse.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    Course.objects.update(
+        total_score=Coalesce(Subquery(lessons.annotate(total=Sum('max_score')).values('total')), Value(0)),
+        lesson_count=Coalesce(Subquery(lessons.annotate(total=Count('id')).values('total')), Value(0)),
+        learner_count=Coalesce(Subquery(learners.annotate(total=Count('id')).values('total')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_course_is_published'),
+        ('user', '0007_usercourse_is_vip'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='learner_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_score',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_aggregates, migrations.RunPython.noop),
+    ]
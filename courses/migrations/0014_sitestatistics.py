@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+def populate_statistics(apps, schema_editor):
+    apps.get_model('courses', 'SiteStatistics').objects.update_or_create(id=1, defaults={
+        'courses_count': apps.get_model('courses', 'Course').objects.filter(is_published=True).count(),
+        'users_count': apps.get_model('user', 'CustomUser').objects.count(),
+        'certificates_count': apps.get_model('courses', 'Certificate').objects.count(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_gradingjob'),
+        ('user', '0009_unique_enrollments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('courses_count', models.PositiveIntegerField(default=0)),
+                ('users_count', models.PositiveIntegerField(default=0)),
+                ('certificates_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'site statistics',
+            },
+        ),
+        migrations.RunPython(populate_statistics, migrations.RunPython.noop),
+    ]
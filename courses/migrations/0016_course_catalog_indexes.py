@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_course_content_version'),
+        ('user', '0010_usercourse_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', '-id'], name='courses_cou_created_cbfe7a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_published', '-created_at', '-id'], name='courses_cou_is_publ_d639ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_published', 'complexity', '-created_at', '-id'], name='courses_cou_is_publ_2f54d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['complexity', '-created_at', '-id'], name='courses_cou_complex_0293b9_idx'),
+        ),
+    ]
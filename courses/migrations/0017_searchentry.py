@@ -0,0 +1,114 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:15
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SEARCHABLE_COMPONENTS = (
+    ('Text', 'content'),
+    ('MultipleChoiceQuestion', 'question'),
+    ('MultipleOptionsQuestion', 'question'),
+    ('CodingQuestion', 'question'),
+)
+
+POSTGRESQL_INDEX = [
+    """
+    ALTER TABLE courses_searchentry ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX courses_searchentry_document_idx ON courses_searchentry USING GIN (document)',
+]
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE courses_searchentry_fts USING fts5(
+        title, body, content='courses_searchentry', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER courses_searchentry_fts_insert AFTER INSERT ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER courses_searchentry_fts_delete AFTER DELETE ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts (courses_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER courses_searchentry_fts_update AFTER UPDATE ON courses_searchentry BEGIN
+        INSERT INTO courses_searchentry_fts (courses_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO courses_searchentry_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS courses_searchentry_fts_insert',
+    'DROP TRIGGER IF EXISTS courses_searchentry_fts_delete',
+    'DROP TRIGGER IF EXISTS courses_searchentry_fts_update',
+    'DROP TABLE IF EXISTS courses_searchentry_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_INDEX, 'sqlite': SQLITE_INDEX}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    # On PostgreSQL the column and its index go away with the table
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+def populate_search_entries(apps, schema_editor):
+    # Mirrors courses.search.build_entries() with the historical models; the index triggers fill FTS5
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    SearchEntry = apps.get_model('courses', 'SearchEntry')
+    bodies = defaultdict(list)
+    for model_name, field in SEARCHABLE_COMPONENTS:
+        rows = apps.get_model('courses', model_name).objects.order_by('serial_number').values_list('lesson_id', field)
+        for lesson_id, text in rows.iterator():
+            bodies[lesson_id].append(text)
+    SearchEntry.objects.bulk_create(
+        (SearchEntry(kind='course', course_id=course_id, title=name, body=description)
+         for course_id, name, description in Course.objects.values_list('id', 'name', 'description').iterator()),
+        batch_size=500)
+    SearchEntry.objects.bulk_create(
+        (SearchEntry(kind='lesson', course_id=course_id, lesson_id=lesson_id, title=title,
+                     body='\n'.join(bodies[lesson_id]))
+         for lesson_id, course_id, title in Lesson.objects.values_list('id', 'course_id', 'title').iterator()),
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('lesson', 'Lesson')], max_length=10)),
+                ('title', models.CharField(max_length=250)),
+                ('body', models.TextField(blank=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='courses.course')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.lesson')),
+            ],
+            options={
+                'verbose_name_plural': 'search entries',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
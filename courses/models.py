@@ -1,9 +1,26 @@
 from django.core.validators import MaxValueValidator
 from django.db import models
+from django.db.models import F, Count, Sum, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 from user.models import CustomUser, UserCourse, UserLesson, UserComponent
 
 
+class CourseQuerySet(models.QuerySet):
+    def recompute_aggregates(self):
+        lessons = Lesson.objects.filter(course=OuterRef('pk')).order_by().values('course')
+        learners = UserCourse.objects.filter(course=OuterRef('pk')).order_by().values('course')
+        return self.update(
+            total_score=Coalesce(Subquery(lessons.annotate(total=Sum('max_score')).values('total')), Value(0)),
+            lesson_count=Coalesce(Subquery(lessons.annotate(total=Count('id')).values('total')), Value(0)),
+            learner_count=Coalesce(Subquery(learners.annotate(total=Count('id')).values('total')), Value(0)),
+            # total_score and lesson_count are not part of the ETag, so corrections to them need a new version
+            content_version=F('content_version') + 1,
+            content_updated_at=Now(),
+        )
+
+
 class Course(models.Model):
     COMPLEXITY_CHOICES = (
         ('junior', 'Junior'),
@@ -18,10 +35,45 @@ class Course(models.Model):
                                    default='ucode/course_banners/ar96xy769kralsw28gu0', overwrite=True)
     learners = models.ManyToManyField(CustomUser, related_name='courses', through=UserCourse)
     is_published = models.BooleanField(default=False)
+    total_score = models.PositiveIntegerField(default=0)
+    lesson_count = models.PositiveIntegerField(default=0)
+    learner_count = models.PositiveIntegerField(default=0)
+    content_version = models.PositiveIntegerField(default=1)
+    content_updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        # Keyset pagination of the catalog walks (created_at, id) within each filter combination
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['is_published', '-created_at', '-id']),
+            models.Index(fields=['is_published', 'complexity', '-created_at', '-id']),
+            models.Index(fields=['complexity', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f'{self.name} - {self.complexity}'
 
+    def update_aggregates(self, **deltas):
+        # The aggregates are part of course payloads, so they move Last-Modified like content writes do
+        self.content_updated_at = timezone.now()
+        Course.objects.filter(id=self.id).update(
+            content_updated_at=self.content_updated_at,
+            **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()})
+        for field, delta in deltas.items():
+            setattr(self, field, max(getattr(self, field) + delta, 0))
+
+    def touch_content(self):
+        """Bump the content version and rebuild the search entries after any write to the course's content."""
+        from .search import reindex_course
+
+        self.content_updated_at = timezone.now()
+        Course.objects.filter(id=self.id).update(content_version=F('content_version') + 1,
+                                                 content_updated_at=self.content_updated_at)
+        self.content_version += 1
+        reindex_course(self.id)
+
 
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons')
@@ -122,6 +174,15 @@ class CodingTest(models.Model):
     output = models.TextField()
 
 
+COMPONENT_MODELS = {
+    'video': Video,
+    'text': Text,
+    'mcq': MultipleChoiceQuestion,
+    'moq': MultipleOptionsQuestion,
+    'coding': CodingQuestion,
+}
+
+
 class Certificate(models.Model):
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -130,3 +191,86 @@ class Certificate(models.Model):
 
     def __str__(self):
         return f"{self.student.username} - {self.course.name} - {self.certificate_id}"
+
+
+class GradingJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='grading_jobs')
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='grading_jobs')
+    source_code = models.TextField()
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default=PENDING)
+    is_correct = models.BooleanField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    # Failed attempts are retried no earlier than this
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.component_id}: {self.status}'
+
+
+class SiteStatistics(models.Model):
+    courses_count = models.PositiveIntegerField(default=0)
+    users_count = models.PositiveIntegerField(default=0)
+    certificates_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'site statistics'
+
+    @classmethod
+    def current(cls):
+        statistics = cls.objects.filter(id=1).first()
+        return statistics or cls.reconcile()
+
+    @classmethod
+    def adjust(cls, **deltas):
+        updated = cls.objects.filter(id=1).update(
+            **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()})
+        if not updated:
+            cls.reconcile()
+
+    @classmethod
+    def reconcile(cls):
+        statistics, _ = cls.objects.update_or_create(id=1, defaults={
+            'courses_count': Course.objects.filter(is_published=True).count(),
+            'users_count': CustomUser.objects.count(),
+            'certificates_count': Certificate.objects.count(),
+        })
+        return statistics
+
+
+class SearchEntry(models.Model):
+    """One searchable document per course and per lesson, rebuilt by courses.search.reindex_course.
+
+    The full-text index itself lives outside the ORM: a generated tsvector column with a GIN index on
+    PostgreSQL and an FTS5 table kept in sync by triggers on SQLite (see migration 0017).
+    """
+    COURSE = 'course'
+    LESSON = 'lesson'
+    KIND_CHOICES = (
+        (COURSE, 'Course'),
+        (LESSON, 'Lesson'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_entries')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    title = models.CharField(max_length=250)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name_plural = 'search entries'
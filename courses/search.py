@@ -0,0 +1,114 @@
+import re
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Course, Lesson, Text, MultipleChoiceQuestion, MultipleOptionsQuestion, CodingQuestion, SearchEntry
+
+# Component subtypes whose text is folded into their lesson's search entry
+SEARCHABLE_COMPONENTS = (
+    (Text, 'content'),
+    (MultipleChoiceQuestion, 'question'),
+    (MultipleOptionsQuestion, 'question'),
+    (CodingQuestion, 'question'),
+)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_entries(course_ids):
+    courses = Course.objects.filter(id__in=course_ids).values_list('id', 'name', 'description')
+    lessons = Lesson.objects.filter(course_id__in=course_ids).values_list('id', 'course_id', 'title')
+    bodies = defaultdict(list)
+    for model, field in SEARCHABLE_COMPONENTS:
+        rows = model.objects.filter(lesson__course_id__in=course_ids).order_by('serial_number') \
+            .values_list('lesson_id', field)
+        for lesson_id, text in rows.iterator():
+            bodies[lesson_id].append(text)
+
+    entries = [SearchEntry(kind=SearchEntry.COURSE, course_id=course_id, title=name, body=description)
+               for course_id, name, description in courses]
+    entries += [SearchEntry(kind=SearchEntry.LESSON, course_id=course_id, lesson_id=lesson_id, title=title,
+                            body='\n'.join(bodies[lesson_id]))
+                for lesson_id, course_id, title in lessons]
+    return entries
+
+
+def reindex_courses(course_ids):
+    """Replace the search entries of the given courses with ones built from their current content."""
+    course_ids = list(course_ids)
+    with transaction.atomic():
+        SearchEntry.objects.filter(course_id__in=course_ids).delete()
+        SearchEntry.objects.bulk_create(build_entries(course_ids), batch_size=500)
+
+
+def reindex_course(course_id):
+    reindex_courses([course_id])
+
+
+def fts5_query(query):
+    # Quote every token so user input cannot use FTS5 syntax; the last one matches as a prefix
+    tokens = ['"{}"'.format(token.replace('"', '""')) for token in TOKEN_RE.findall(query)]
+    if tokens:
+        tokens[-1] += '*'
+    return ' '.join(tokens)
+
+
+def tsquery(query):
+    # Same matching as fts5_query(): every token must occur and the last one matches as a prefix
+    tokens = ["'{}'".format(token.replace("'", "''")) for token in TOKEN_RE.findall(query)]
+    if tokens:
+        tokens[-1] += ':*'
+    return ' & '.join(tokens)
+
+
+def ranked_ids(query, published_only, limit, offset):
+    """Return [(entry_id, rank)] best first, using the database's full-text index."""
+    published = 'AND c.is_published' if published_only else ''
+    if connection.vendor == 'postgresql':
+        query = tsquery(query)
+        if not query:
+            return []
+        sql = f'''
+            SELECT e.id, ts_rank(e.document, q.query) AS score
+            FROM courses_searchentry e
+            JOIN courses_course c ON c.id = e.course_id,
+                 to_tsquery('simple', %s) AS q(query)
+            WHERE e.document @@ q.query {published}
+            ORDER BY score DESC, e.id
+            LIMIT %s OFFSET %s
+        '''
+        params = [query, limit, offset]
+    elif connection.vendor == 'sqlite':
+        query = fts5_query(query)
+        if not query:
+            return []
+        # bm25() is lower for better matches; negate it so a higher score is better on every backend
+        sql = f'''
+            SELECT e.id, -bm25(courses_searchentry_fts, 10.0, 1.0) AS score
+            FROM courses_searchentry_fts
+            JOIN courses_searchentry e ON e.id = courses_searchentry_fts.rowid
+            JOIN courses_course c ON c.id = e.course_id
+            WHERE courses_searchentry_fts MATCH %s {published}
+            ORDER BY score DESC, e.id
+            LIMIT %s OFFSET %s
+        '''
+        params = [query, limit, offset]
+    else:
+        entries = SearchEntry.objects.filter(Q(title__icontains=query) | Q(body__icontains=query))
+        if published_only:
+            entries = entries.filter(course__is_published=True)
+        entry_ids = entries.order_by('id').values_list('id', flat=True)[offset:offset + limit]
+        return [(entry_id, 0.0) for entry_id in entry_ids]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(query, published_only=True, limit=20, offset=0):
+    """Return up to limit SearchEntry objects matching query, best first, each with a rank attribute."""
+    ranks = dict(ranked_ids(query, published_only, limit, offset))
+    entries = SearchEntry.objects.filter(id__in=ranks).select_related('course', 'lesson')
+    for entry in entries:
+        entry.rank = ranks[entry.id]
+    return sorted(entries, key=lambda entry: (-entry.rank, entry.id))
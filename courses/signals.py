@@ -0,0 +1,68 @@
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.cache import bump_cache_version
+from user.models import CustomUser, UserCourse
+from .models import Course, Certificate, SiteStatistics
+from .search import reindex_course
+
+
+@receiver(post_save, sender=CustomUser)
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        SiteStatistics.adjust(users_count=1)
+        bump_cache_version('statistics')
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    SiteStatistics.adjust(users_count=-1)
+    bump_cache_version('statistics')
+
+
+@receiver(post_save, sender=Certificate)
+def certificate_created(sender, instance, created, **kwargs):
+    if created:
+        SiteStatistics.adjust(certificates_count=1)
+        bump_cache_version('statistics')
+
+
+@receiver(post_delete, sender=Certificate)
+def certificate_deleted(sender, instance, **kwargs):
+    SiteStatistics.adjust(certificates_count=-1)
+    bump_cache_version('statistics')
+
+
+@receiver(pre_save, sender=Course)
+def course_saving(sender, instance, update_fields=None, **kwargs):
+    # Remember the stored is_published, so course_saved only touches the counter when it changes
+    instance.was_published = None
+    if instance.pk is not None and (update_fields is None or 'is_published' in update_fields):
+        instance.was_published = Course.objects.filter(pk=instance.pk).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, **kwargs):
+    if created:
+        reindex_course(instance.id)
+    was_published = False if created else getattr(instance, 'was_published', None)
+    if was_published is not None and was_published != instance.is_published:
+        SiteStatistics.adjust(courses_count=1 if instance.is_published else -1)
+        bump_cache_version('statistics')
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    if instance.is_published:
+        SiteStatistics.adjust(courses_count=-1)
+        bump_cache_version('statistics')
+
+
+@receiver(post_delete, sender=UserCourse)
+def enrollment_deleted(sender, instance, **kwargs):
+    # A filter update rather than instance.course, which is gone when the course itself is being deleted
+    Course.objects.filter(id=instance.course_id).update(learner_count=Greatest(F('learner_count') - 1, Value(0)),
+                                                        content_updated_at=timezone.now())
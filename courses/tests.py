@@ -1,3 +1,905 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import skipIf, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib import admin
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.cache import bump_cache_version, version_key
+from api.metrics import registry
+from api.serializers import LessonSerializer
+from user.models import CustomUser, UserLesson, UserCourse, UserComponent
+from .benchmark import run_benchmarks
+from .checks import response_cache_check
+from .grading import MAX_ATTEMPTS, apply_score, requeue_stale_jobs, work
+from .judge.base import BaseExecutor, JudgeError
+from .judge.cache import CachingExecutor, cache_stats
+from .judge.fake import FakeJudge0Server
+from .judge.judge0 import Judge0Client
+from .judge.local import LocalExecutor
+from .loadtest import run_load_test
+from .search import search
+from .transfer import TransferError, import_course
+from .models import (
+    Course, Lesson, Video, Text, MultipleChoiceQuestion, MultipleOptionsQuestion, CodingQuestion,
+    Component, MultipleChoiceOption, MultipleOptionsOption, CodingTest, GradingJob, SearchEntry
+)
+
+
+def create_lesson(course, serial_number):
+    lesson = Lesson.objects.create(course=course, title=f'Lesson {serial_number}', max_score=100,
+                                   serial_number=serial_number)
+    Video.objects.create(lesson=lesson, max_score=10, serial_number=1, video_url='https://example.com/v.mp4')
+    Text.objects.create(lesson=lesson, max_score=10, serial_number=2, content='Text')
+    mcq = MultipleChoiceQuestion.objects.create(lesson=lesson, max_score=20, serial_number=3, question='MCQ')
+    MultipleChoiceOption.objects.create(question=mcq, option='a', is_correct=True)
+    MultipleChoiceOption.objects.create(question=mcq, option='b')
+    moq = MultipleOptionsQuestion.objects.create(lesson=lesson, max_score=20, serial_number=4, question='MOQ')
+    MultipleOptionsOption.objects.create(question=moq, option='a', is_correct=True)
+    coding = CodingQuestion.objects.create(lesson=lesson, max_score=40, serial_number=5, question='Code')
+    CodingTest.objects.create(question=coding, input='1', output='1')
+    return lesson
+
+
+class LessonSerializerQueriesTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+
+    def render_lessons(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = LessonSerializer(self.course.lessons.all(), many=True).data
+        return data, len(queries)
+
+    def test_query_count_does_not_grow_with_lessons(self):
+        for serial_number in range(1, 3):
+            UserLesson.objects.create(user=self.user, lesson=create_lesson(self.course, serial_number))
+        _, few = self.render_lessons()
+        for serial_number in range(3, 9):
+            UserLesson.objects.create(user=self.user, lesson=create_lesson(self.course, serial_number))
+        data, many = self.render_lessons()
+        self.assertEqual(few, many)
+        self.assertEqual(len(data), 8)
+
+    def test_component_data_matches_subtype(self):
+        create_lesson(self.course, 1)
+        data, _ = self.render_lessons()
+        components = {component['type']: component['data'] for component in data[0]['components']}
+        self.assertEqual(components['video'], {'video_url': 'https://example.com/v.mp4'})
+        self.assertEqual(components['text'], {'content': 'Text'})
+        self.assertEqual(len(components['mcq']['options']), 2)
+        self.assertEqual(len(components['moq']['options']), 1)
+        self.assertEqual(components['coding']['tests'][0]['output'], '1')
+
+
+class CourseAggregatesTest(TestCase):
+    def test_recompute_aggregates_repairs_drift(self):
+        user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        create_lesson(course, 1)
+        create_lesson(course, 2)
+        course.learners.add(user)
+        course.update_aggregates(total_score=5, learner_count=-3)
+        Course.objects.filter(id=course.id).recompute_aggregates()
+        course.refresh_from_db()
+        self.assertEqual((course.total_score, course.lesson_count, course.learner_count), (200, 2, 1))
+
+
+class Judge0ClientTest(SimpleTestCase):
+    source_code = 'print(int(input()) * 2)'
+
+    def run_tests(self, server, tests, source_code=None):
+        client = Judge0Client(base_url=server.url, api_key='', host='', timeout=10)
+        return client.run_tests(source_code or self.source_code, 'python', tests)
+
+    def test_all_tests_pass(self):
+        tests = [CodingTest(input=str(number), output=str(number * 2)) for number in range(5)]
+        with FakeJudge0Server() as server:
+            self.assertTrue(self.run_tests(server, tests))
+            self.assertEqual(len(server.submissions), 5)
+
+    def test_waits_for_slow_judge(self):
+        with FakeJudge0Server(latency=0.5) as server:
+            self.assertTrue(self.run_tests(server, [CodingTest(input='3', output='6')]))
+
+    def test_stops_at_first_failure(self):
+        tests = [CodingTest(input='1', output='2'), CodingTest(input='2', output='5')]
+        with FakeJudge0Server() as server:
+            self.assertFalse(self.run_tests(server, tests))
+
+    def test_runtime_error_fails(self):
+        with FakeJudge0Server() as server:
+            self.assertFalse(self.run_tests(server, [CodingTest(input='1', output='2')], 'raise SystemExit(1)'))
+
+    def test_internal_error_raises(self):
+        # The fake judge answers Internal Error for languages it cannot run
+        with FakeJudge0Server() as server, self.assertRaisesMessage(JudgeError, 'could not run the submission'):
+            client = Judge0Client(base_url=server.url, api_key='', host='', timeout=10)
+            client.run_tests('console.log(2)', 'javascript', [CodingTest(input='1', output='2')])
+
+    def test_missing_result_raises(self):
+        with FakeJudge0Server() as server, self.assertRaisesMessage(JudgeError, 'unknown submission'):
+            client = Judge0Client(base_url=server.url, api_key='', host='', timeout=10)
+            client.fetch_batch = lambda tokens: [None]
+            client.run_tests(self.source_code, 'python', [CodingTest(input='1', output='2')])
+
+    def test_missing_api_key_raises(self):
+        client = Judge0Client(base_url='http://127.0.0.1:1', api_key='', host='judge0-ce.p.rapidapi.com')
+        with self.assertRaisesMessage(JudgeError, 'JUDGE0_API_KEY is not set'):
+            client.run_tests('print(1)', 'python', [CodingTest(input='', output='1')])
+
+    def test_failing_judge_raises(self):
+        with FakeJudge0Server(failure_rate=1) as server, self.assertRaisesMessage(JudgeError, '503'):
+            self.run_tests(server, [CodingTest(input='1', output='2')])
+
+    def test_full_queue_refuses_submissions(self):
+        tests = [CodingTest(input=str(number), output=str(number * 2)) for number in range(3)]
+        with FakeJudge0Server(latency=0.5, workers=1, queue_limit=1) as server:
+            with self.assertRaisesMessage(JudgeError, '429'):
+                self.run_tests(server, tests)
+            self.assertEqual(server.stats()['rejected'], 3)
+
+
+@override_settings(DEBUG=True)
+class LocalExecutorTest(SimpleTestCase):
+    def setUp(self):
+        self.executor = LocalExecutor(time_limit=1, memory_limit=256)
+
+    def test_python_tests_pass(self):
+        tests = [CodingTest(input='2', output='4'), CodingTest(input='5', output='10')]
+        self.assertTrue(self.executor.run_tests('print(int(input()) * 2)', 'python', tests))
+
+    def test_wrong_output_fails(self):
+        self.assertFalse(self.executor.run_tests('print(0)', 'python', [CodingTest(input='2', output='4')]))
+
+    def test_time_limit_fails(self):
+        self.assertFalse(self.executor.run_tests('while True: pass', 'python', [CodingTest(output='1')]))
+
+    def test_child_processes_are_killed_on_timeout(self):
+        marker = os.path.join(tempfile.mkdtemp(), 'survived')
+        source_code = ('import subprocess, sys\n'
+                       f'subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3); open({marker!r}, \'w\')"])\n'
+                       'while True: pass')
+        self.assertFalse(self.executor.run_tests(source_code, 'python', [CodingTest(output='1')]))
+        time.sleep(3.5)
+        self.assertFalse(os.path.exists(marker))
+
+    @skipIf(os.geteuid() == 0, 'RLIMIT_NPROC does not apply to root')
+    def test_process_limit(self):
+        executor = LocalExecutor(time_limit=1, memory_limit=256, max_processes=1)
+        source_code = 'import os\ntry:\n    os.fork()\nexcept OSError:\n    print("blocked")'
+        self.assertTrue(executor.run_tests(source_code, 'python', [CodingTest(output='blocked')]))
+
+    @override_settings(DEBUG=False)
+    def test_refused_without_debug(self):
+        with self.assertRaisesMessage(JudgeError, 'only runs with DEBUG on'):
+            LocalExecutor()
+
+
+class CachingExecutorTest(SimpleTestCase):
+    class CountingExecutor(BaseExecutor):
+        def __init__(self):
+            self.calls = 0
+
+        def run_tests(self, source_code, language, tests):
+            self.calls += 1
+            if source_code == 'judge down':
+                raise JudgeError('Judge0 request failed: 503')
+            return source_code == 'correct'
+
+    def setUp(self):
+        caches['judge'].clear()
+        self.inner = self.CountingExecutor()
+        self.executor = CachingExecutor(self.inner)
+        self.tests = [CodingTest(input='1', output='2')]
+
+    def test_identical_submissions_hit_cache(self):
+        for _ in range(3):
+            self.assertTrue(self.executor.run_tests('correct', 'python', self.tests))
+            self.assertFalse(self.executor.run_tests('wrong', 'python', self.tests))
+        self.assertEqual(self.inner.calls, 2)
+        self.assertEqual(cache_stats(), {'hits': 4, 'misses': 2, 'hit_ratio': 0.6667})
+
+    def test_changed_tests_miss_cache(self):
+        self.executor.run_tests('correct', 'python', self.tests)
+        self.executor.run_tests('correct', 'python', [CodingTest(input='1', output='3')])
+        self.executor.run_tests('correct', 'java', self.tests)
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_judge_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(JudgeError):
+                self.executor.run_tests('judge down', 'python', self.tests)
+        self.assertEqual(self.inner.calls, 2)
+        self.assertEqual(cache_stats()['hits'], 0)
+
+
+# work() closes old connections like a real worker, which would end a TestCase's transaction on PostgreSQL
+@override_settings(CODE_EXECUTOR='local', JUDGE_CACHE_ENABLED=False, DEBUG=True)
+class GradingJobTest(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro', is_published=True)
+        lesson = create_lesson(course, 1)
+        Course.objects.filter(id=course.id).recompute_aggregates()
+        UserCourse.objects.create(user=self.user, course=course)
+        UserLesson.objects.create(user=self.user, lesson=lesson)
+        self.question = CodingQuestion.objects.get(lesson=lesson)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, answer):
+        response = self.client.post(f'/api/task-check/{self.question.id}/', {'answer': answer}, format='json')
+        self.assertEqual(response.status_code, 202)
+        return response.data['job_id']
+
+    def test_answers_to_lessons_not_started_are_refused(self):
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_authenticate(other)
+        response = self.client.post(f'/api/task-check/{self.question.id}/', {'answer': 'print(1)'}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(f'/api/task-check/{self.question.id}/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GradingJob.objects.exists())
+
+    def test_job_is_graded_by_worker(self):
+        job_id = self.submit('print(input())')
+        self.assertEqual(self.client.get(f'/api/task-check/jobs/{job_id}/').data['status'], GradingJob.PENDING)
+        self.assertEqual(work(burst=True), 1)
+        data = self.client.get(f'/api/task-check/jobs/{job_id}/').data
+        self.assertEqual((data['status'], data['is_correct']), (GradingJob.DONE, True))
+        self.assertEqual(UserComponent.objects.get(user=self.user, component=self.question).score, 40)
+
+    def test_wrong_answer_scores_zero(self):
+        job_id = self.submit('print(0)')
+        work(burst=True)
+        self.assertFalse(GradingJob.objects.get(id=job_id).is_correct)
+        self.assertEqual(UserLesson.objects.get(user=self.user).score, 0)
+
+    @override_settings(CODE_EXECUTOR='courses.tests.FailingExecutor')
+    def test_judge_errors_are_retried_with_backoff(self):
+        job_id = self.submit('print(input())')
+        work(burst=True)
+        job = GradingJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.attempts, job.error), (GradingJob.PENDING, 1, 'Judge is down'))
+        self.assertGreater(job.available_at, timezone.now())
+        self.assertEqual(work(burst=True), 0)
+        for _ in range(MAX_ATTEMPTS - 1):
+            GradingJob.objects.filter(id=job_id).update(available_at=timezone.now())
+            work(burst=True)
+        job = GradingJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.attempts), (GradingJob.FAILED, MAX_ATTEMPTS))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_jobs_fail_after_max_attempts(self):
+        started_at = timezone.now() - timedelta(minutes=10)
+        retried = GradingJob.objects.create(user=self.user, component=self.question, source_code='print(1)',
+                                            status=GradingJob.RUNNING, attempts=1, started_at=started_at)
+        exhausted = GradingJob.objects.create(user=self.user, component=self.question, source_code='print(1)',
+                                              status=GradingJob.RUNNING, attempts=MAX_ATTEMPTS, started_at=started_at)
+        self.assertEqual(requeue_stale_jobs(300), 1)
+        self.assertEqual(GradingJob.objects.get(id=retried.id).status, GradingJob.PENDING)
+        self.assertEqual(GradingJob.objects.get(id=exhausted.id).status, GradingJob.FAILED)
+
+
+class FailingExecutor(BaseExecutor):
+    def run_tests(self, source_code, language, tests):
+        raise JudgeError('Judge is down')
+
+
+class ApplyScoreMixin:
+    def create_enrollment(self):
+        self.user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.lesson = create_lesson(self.course, 1)
+        create_lesson(self.course, 2)
+        Course.objects.filter(id=self.course.id).recompute_aggregates()
+        UserCourse.objects.create(user=self.user, course=self.course)
+        UserLesson.objects.create(user=self.user, lesson=self.lesson)
+        self.components = list(Component.objects.filter(lesson=self.lesson).select_related('lesson__course'))
+
+    def answer_all(self, is_correct):
+        for component in self.components:
+            apply_score(self.user, component, is_correct)
+
+    def assert_scores(self, lesson_score, progress):
+        self.assertEqual(UserLesson.objects.get(user=self.user, lesson=self.lesson).score, lesson_score)
+        self.assertEqual(UserCourse.objects.get(user=self.user, course=self.course).progress, progress)
+
+
+class ApplyScoreTest(ApplyScoreMixin, TestCase):
+    def setUp(self):
+        self.create_enrollment()
+
+    def test_repeated_answers_do_not_inflate_progress(self):
+        self.answer_all(True)
+        self.answer_all(True)
+        self.assert_scores(100, 100)
+        apply_score(self.user, self.components[-1], False)
+        self.assert_scores(60, 0)
+        self.answer_all(True)
+        self.assert_scores(100, 100)
+
+    def test_course_completion(self):
+        self.answer_all(True)
+        self.assertFalse(UserCourse.objects.get(user=self.user).is_completed)
+        other_lesson = Lesson.objects.get(course=self.course, serial_number=2)
+        UserLesson.objects.create(user=self.user, lesson=other_lesson)
+        for component in Component.objects.filter(lesson=other_lesson).select_related('lesson__course'):
+            apply_score(self.user, component, True)
+        self.assertTrue(UserCourse.objects.get(user=self.user).is_completed)
+
+    def test_recompute_matches_incremental_progress(self):
+        self.answer_all(True)
+        apply_score(self.user, self.components[-1], False)
+        user_course = UserCourse.objects.get(user=self.user)
+        self.assertEqual((user_course.lesson_scores, user_course.completed_lessons), ({str(self.lesson.id): 60}, []))
+        self.answer_all(True)
+        expected = UserCourse.objects.values('lesson_scores', 'completed_lessons', 'progress', 'percentage').get()
+        UserCourse.objects.update(lesson_scores={}, completed_lessons=[], progress=0, percentage=0)
+        UserCourse.objects.all().recompute_progress()
+        self.assertEqual(UserCourse.objects.values('lesson_scores', 'completed_lessons', 'progress', 'percentage').get(),
+                         expected)
+        self.assertEqual(expected['percentage'], 50)
+
+    def test_query_budget(self):
+        apply_score(self.user, self.components[0], True)
+        with CaptureQueriesContext(connection) as queries:
+            apply_score(self.user, self.components[0], False)
+        self.assertLessEqual(len(queries), 8)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentApplyScoreTest(ApplyScoreMixin, TransactionTestCase):
+    def setUp(self):
+        self.create_enrollment()
+
+    def test_parallel_answers_keep_scores_consistent(self):
+        barrier = threading.Barrier(len(self.components))
+
+        def answer(component):
+            barrier.wait()
+            try:
+                for is_correct in (True, False, True):
+                    apply_score(self.user, component, is_correct)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=answer, args=(component,)) for component in self.components]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assert_scores(100, 100)
+
+
+class EnrollmentTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.lesson = create_lesson(self.course, 1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_enrollment_is_idempotent(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(f'/api/courses/{self.course.id}/').status_code, 200)
+        self.assertEqual(UserCourse.objects.filter(user=self.user, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.learner_count, 1)
+
+    def test_unenrolling_decrements_learner_count(self):
+        self.client.get(f'/api/courses/{self.course.id}/')
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_authenticate(other)
+        self.client.get(f'/api/courses/{self.course.id}/')
+        UserCourse.objects.get(user=self.user).delete()
+        other.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.learner_count, 0)
+        # Deleting the course cascades to its remaining enrollments
+        UserCourse.objects.create(user=self.user, course=self.course)
+        self.course.delete()
+        self.assertFalse(Course.objects.exists())
+
+    def test_lesson_start_is_idempotent(self):
+        self.client.get(f'/api/courses/{self.course.id}/')
+        responses = [self.client.post(f'/api/lessons/{self.lesson.id}/start/') for _ in range(2)]
+        self.assertEqual([response.data['message'] for response in responses],
+                         ['Lesson started successfully', 'Lesson already started'])
+        self.assertEqual(UserLesson.objects.get(user=self.user).score, 20)
+        self.assertEqual(UserCourse.objects.get(user=self.user).lesson_scores, {str(self.lesson.id): 20})
+
+
+class CourseEnrollmentsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro',
+                                            is_published=True)
+        CustomUser.objects.bulk_create([CustomUser(username=f'student{n}', email=f'student{n}@example.com')
+                                        for n in range(501)])
+        users = list(CustomUser.objects.order_by('id'))
+        UserCourse.objects.bulk_create([UserCourse(user=user, course=self.course, is_completed=n < 3)
+                                        for n, user in enumerate(users)])
+        self.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='x',
+                                                    is_staff=True)
+        self.client = APIClient()
+
+    def test_staff_only(self):
+        url = f'/api/courses/{self.course.id}/enrollments/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(CustomUser.objects.get(username='student0'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_page_size_and_max(self):
+        self.client.force_authenticate(self.staff)
+        url = f'/api/courses/{self.course.id}/enrollments/'
+        response = self.client.get(url)
+        self.assertEqual((response.data['count'], len(response.data['results'])), (501, 50))
+        self.assertEqual(len(self.client.get(url, {'page_size': 10}).data['results']), 10)
+        self.assertEqual(len(self.client.get(url, {'page_size': 1000}).data['results']), 500)
+
+    def test_catalog_completed_count(self):
+        Course.objects.create(name='Java', complexity='middle', description='OOP', is_published=True)
+        counts = {course['name']: course['completed_count']
+                  for course in self.client.get('/api/courses/').data['results']}
+        self.assertEqual(counts, {'Python': 3, 'Java': 0})
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=60)
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='x',
+                                                    is_staff=True)
+        Course.objects.create(name='Python', complexity='junior', description='Intro', is_published=True)
+        self.client = APIClient()
+
+    def test_locmem_cache_is_refused_outside_debug(self):
+        self.assertEqual([error.id for error in response_cache_check(None)], ['courses.E002'])
+        with override_settings(DEBUG=True):
+            self.assertEqual(response_cache_check(None), [])
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+            self.assertEqual(response_cache_check(None), [])
+
+    def test_hits_skip_database_until_version_bump(self):
+        self.assertEqual(len(self.client.get('/api/courses/').data['results']), 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.client.get('/api/courses/').data['results']), 1)
+        self.assertEqual(len(queries), 0)
+        self.client.force_authenticate(self.staff)
+        self.client.post('/api/courses/create/', {'name': 'Java', 'complexity': 'middle', 'description': 'OOP'})
+        self.assertEqual(len(self.client.get('/api/courses/').data['results']), 2)
+        self.client.force_authenticate(None)
+        self.assertEqual(len(self.client.get('/api/courses/').data['results']), 1)
+
+    def test_evicted_version_does_not_serve_stale_responses(self):
+        self.client.get('/api/courses/')
+        bump_cache_version('catalog')
+        Course.objects.create(name='Java', complexity='middle', description='OOP', is_published=True)
+        # Losing the version key must not fall back to the version the stale response was stored under
+        cache.delete(version_key('catalog'))
+        self.assertEqual(len(self.client.get('/api/courses/').data['results']), 2)
+
+
+class CatalogPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for n in range(7):
+            Course.objects.create(name=f'Course {n}', complexity='junior' if n % 2 else 'senior',
+                                  description='Intro', is_published=n != 6)
+        # Equal timestamps must still page by id without skipping or repeating rows
+        Course.objects.filter(name__in=['Course 2', 'Course 3', 'Course 4']).update(
+            created_at=Course.objects.get(name='Course 3').created_at)
+        self.client = APIClient()
+
+    def walk(self, url):
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [course['name'] for course in response.data['results']]
+            url = response.data['next']
+        return names
+
+    def test_pages_cover_published_courses_once(self):
+        names = self.walk('/api/courses/?page_size=2')
+        self.assertEqual(sorted(names), [f'Course {n}' for n in range(6)])
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_filters_and_invalid_input(self):
+        self.assertEqual(sorted(self.walk('/api/courses/?complexity=junior')), ['Course 1', 'Course 3', 'Course 5'])
+        self.assertEqual(self.client.get('/api/courses/?complexity=expert').status_code, 400)
+        self.assertEqual(self.client.get('/api/courses/?cursor=bogus').status_code, 404)
+
+
+class LessonCreateTest(TestCase):
+    COMPONENTS = [
+        {'type': 'video', 'max_score': 10, 'serial_number': 1, 'video_url': 'https://example.com/v.mp4'},
+        {'type': 'text', 'max_score': 10, 'serial_number': 2, 'content': 'Text'},
+        {'type': 'mcq', 'max_score': 20, 'serial_number': 3, 'question': 'MCQ',
+         'options': [{'option': 'a', 'is_correct': True}, {'option': 'b'}]},
+        {'type': 'moq', 'max_score': 20, 'serial_number': 4, 'question': 'MOQ',
+         'options': [{'option': 'a', 'is_correct': True}]},
+        {'type': 'coding', 'max_score': 40, 'serial_number': 5, 'question': 'Code', 'language': 'python',
+         'tests': [{'input': '1', 'output': '1'}]},
+    ]
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='x', is_staff=True))
+
+    def create(self, components, serial_number=1):
+        return self.client.post('/api/lessons/create/', {
+            'course_id': self.course.id, 'title': 'Lesson', 'serial_number': serial_number, 'max_score': 100,
+            'components': json.dumps(components),
+        })
+
+    def test_creates_every_component_type(self):
+        self.assertEqual(self.create(self.COMPONENTS).status_code, 200)
+        lesson = Lesson.objects.get(course=self.course)
+        self.assertEqual(sorted(lesson.components.values_list('type', flat=True)),
+                         ['coding', 'mcq', 'moq', 'text', 'video'])
+        self.assertEqual(MultipleChoiceQuestion.objects.get(lesson=lesson).options.count(), 2)
+        self.assertEqual(CodingQuestion.objects.get(lesson=lesson).tests.get().output, '1')
+        self.assertEqual(LessonSerializer(lesson).data['components'][0]['data']['video_url'],
+                         'https://example.com/v.mp4')
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.total_score, self.course.lesson_count), (100, 1))
+
+    def test_query_count_does_not_grow_with_components(self):
+        with CaptureQueriesContext(connection) as small:
+            self.create(self.COMPONENTS, serial_number=1)
+        with CaptureQueriesContext(connection) as large:
+            self.create(self.COMPONENTS * 10, serial_number=2)
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_component_creates_nothing(self):
+        components = self.COMPONENTS + [{'type': 'mcq', 'max_score': 10, 'serial_number': 6}]
+        self.assertEqual(self.create(components).status_code, 400)
+        self.assertFalse(Lesson.objects.exists())
+        self.assertFalse(Component.objects.exists())
+
+
+class LessonPatchTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.lesson = create_lesson(self.course, 1)
+        self.learner = CustomUser.objects.create_user(username='learner', email='learner@example.com', password='x')
+        self.video = Video.objects.get(lesson=self.lesson)
+        self.progress = UserComponent.objects.create(user=self.learner, component=self.video, score=10)
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='x', is_staff=True))
+
+    def payload(self):
+        mcq = MultipleChoiceQuestion.objects.get(lesson=self.lesson)
+        coding = CodingQuestion.objects.get(lesson=self.lesson)
+        return [
+            {'id': self.video.id, 'type': 'video', 'max_score': 10, 'serial_number': 1,
+             'video_url': 'https://example.com/v.mp4'},
+            {'id': Text.objects.get(lesson=self.lesson).id, 'type': 'text', 'max_score': 10, 'serial_number': 2,
+             'content': 'Fixed typo'},
+            {'id': mcq.id, 'type': 'mcq', 'max_score': 20, 'serial_number': 3, 'question': 'MCQ',
+             'options': [{'option': 'a', 'is_correct': True}, {'option': 'c'}]},
+            {'id': coding.id, 'type': 'coding', 'max_score': 40, 'serial_number': 4, 'question': 'Code',
+             'language': 'python', 'tests': [{'input': '1', 'output': '1'}]},
+            {'type': 'text', 'max_score': 20, 'serial_number': 5, 'content': 'New'},
+        ]
+
+    def patch(self, data):
+        return self.client.patch(f'/api/lessons/update/{self.lesson.id}/', data, format='json')
+
+    def test_applies_only_the_diff(self):
+        response = self.patch({'title': 'Renamed', 'components': self.payload()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['deleted']), (1, 3, 1))
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.title, 'Renamed')
+        self.assertFalse(MultipleOptionsQuestion.objects.filter(lesson=self.lesson).exists())
+        self.assertEqual(Text.objects.filter(lesson=self.lesson).order_by('serial_number')[0].content, 'Fixed typo')
+        self.assertEqual(sorted(MultipleChoiceOption.objects.filter(question__lesson=self.lesson)
+                                .values_list('option', flat=True)), ['a', 'c'])
+        self.assertTrue(UserComponent.objects.filter(id=self.progress.id, score=10).exists())
+
+    def test_unchanged_tree_writes_nothing(self):
+        components = self.payload()[:4]
+        self.patch({'components': components})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch({'components': components})
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['deleted']), (0, 0, 0))
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'DELETE'))])
+
+    def test_learner_scores_follow_component_changes(self):
+        Course.objects.filter(id=self.course.id).recompute_aggregates()
+        UserCourse.objects.create(user=self.learner, course=self.course)
+        UserLesson.objects.create(user=self.learner, lesson=self.lesson, score=20)
+        for component in Component.objects.filter(lesson=self.lesson, type__in=('moq', 'coding')) \
+                .select_related('lesson__course'):
+            apply_score(self.learner, component, True)
+        self.assertTrue(UserLesson.objects.get(user=self.learner).is_completed)
+        components = self.payload()[:4]
+        components[3]['max_score'] = 30
+        self.patch({'components': components})
+        coding = CodingQuestion.objects.get(lesson=self.lesson)
+        self.assertEqual(UserComponent.objects.get(user=self.learner, component=coding).score, 30)
+        user_lesson = UserLesson.objects.get(user=self.learner)
+        self.assertEqual((user_lesson.score, user_lesson.is_completed), (50, False))
+        user_course = UserCourse.objects.get(user=self.learner)
+        self.assertEqual((user_course.lesson_scores, user_course.completed_lessons), ({str(self.lesson.id): 50}, []))
+
+    def test_rejects_components_of_other_lessons(self):
+        other = create_lesson(self.course, 2)
+        components = self.payload()
+        components[0]['id'] = other.components.first().id
+        self.assertEqual(self.patch({'components': components}).status_code, 400)
+        self.assertEqual(self.lesson.components.count(), 5)
+
+
+class CourseTransferTest(TestCase):
+    def test_export_import_round_trip(self):
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        for serial_number in (1, 2):
+            create_lesson(course, serial_number)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'course.ndjson')
+            call_command('export_course', course.id, output=path, stderr=StringIO())
+            with open(path) as stream:
+                lines = [json.loads(line) for line in stream]
+            call_command('import_course', path, name='Python copy', stdout=StringIO())
+        self.assertEqual((lines[0]['kind'], lines[0]['version'], len(lines)), ('course', 1, 1 + 2 + 10))
+        copy = Course.objects.get(name='Python copy')
+        self.assertEqual((copy.lesson_count, copy.total_score), (2, 200))
+        self.assertEqual(Component.objects.filter(lesson__course=copy).count(), 10)
+        self.assertEqual(MultipleChoiceOption.objects.filter(question__lesson__course=copy).count(), 4)
+        self.assertEqual(CodingTest.objects.filter(question__lesson__course=copy, input='1', output='1').count(), 2)
+
+    def test_export_to_stdout(self):
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        create_lesson(course, 1)
+        create_lesson(course, 2)
+        stdout = StringIO()
+        call_command('export_course', course.id, stdout=stdout, stderr=StringIO())
+        lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([line['kind'] for line in lines[:2]], ['course', 'lesson'])
+        self.assertEqual(len(lines), 1 + 2 + 10)
+        with CaptureQueriesContext(connection) as queries:
+            import_course(StringIO(stdout.getvalue()))
+        lesson_inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "courses_lesson"')]
+        self.assertEqual(len(lesson_inserts), 1)
+
+    def test_rejects_unknown_version(self):
+        with self.assertRaises(TransferError):
+            import_course(StringIO(json.dumps({'kind': 'course', 'version': 99}) + '\n'))
+        self.assertFalse(Course.objects.exists())
+
+
+class ConditionalContentTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.lesson = create_lesson(self.course, 1)
+        self.other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        UserCourse.objects.create(user=self.other, course=self.course)
+        UserLesson.objects.create(user=self.other, lesson=self.lesson, score=20)
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='learner', email='learner@example.com', password='x'))
+
+    def test_revalidation_returns_304_without_serializing(self):
+        for url in (f'/api/courses/{self.course.id}/', f'/api/courses/{self.course.id}/lessons/',
+                    f'/api/lessons/{self.lesson.id}/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            with CaptureQueriesContext(connection) as queries:
+                revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertLessEqual(len(queries), 3)
+
+    def test_content_write_changes_etag(self):
+        url = f'/api/courses/{self.course.id}/lessons/'
+        etag = self.client.get(url)['ETag']
+        self.course.refresh_from_db()
+        self.course.touch_content()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_recompute_aggregates_changes_etag(self):
+        url = f'/api/courses/{self.course.id}/lessons/'
+        self.client.get(url)
+        Course.objects.filter(id=self.course.id).recompute_aggregates()
+        etag = self.client.get(url)['ETag']
+        # Nothing to correct this time, but the stored rows were rewritten
+        Course.objects.filter(id=self.course.id).recompute_aggregates()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_course_update_cannot_rewind_content_version(self):
+        Course.objects.filter(id=self.course.id).update(content_version=5)
+        staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', password='x', is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.put(f'/api/courses/update/{self.course.id}/', {
+            'name': 'Python', 'complexity': 'junior', 'description': 'Intro', 'content_version': 1,
+            'content_updated_at': '2000-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.content_version, 6)
+        self.assertGreater(self.course.content_updated_at.year, 2000)
+
+    def test_admin_edit_changes_etag(self):
+        url = f'/api/courses/{self.course.id}/?expand=components'
+        etag = self.client.get(url)['ETag']
+        text = Text.objects.get(lesson=self.lesson)
+        text.content = 'Edited in admin'
+        admin.site._registry[Text].save_model(None, text, None, True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lessons'][0]['components'][1]['data']['content'], 'Edited in admin')
+
+    def test_learner_count_moves_last_modified(self):
+        url = f'/api/courses/{self.course.id}/'
+        self.client.get(url)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Course.objects.filter(id=self.course.id).update(created_at=an_hour_ago, content_updated_at=an_hour_ago)
+        UserCourse.objects.update(updated_at=an_hour_ago)
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        newcomer = APIClient()
+        newcomer.force_authenticate(CustomUser.objects.create_user(username='newcomer', email='new@example.com',
+                                                                   password='x'))
+        newcomer.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual((response.status_code, response.data['course']['learner_count']), (200, 2))
+
+    def test_learner_rows_are_limited_to_the_caller(self):
+        response = self.client.get(f'/api/courses/{self.course.id}/?expand=components')
+        self.assertEqual(response.data['lessons'][0]['user_lessons'], [])
+        self.assertEqual(response.data['lessons'][0]['students'], [])
+        self.assertEqual(len(response.data['course']['user_courses']), 1)
+
+
+class LessonSummaryTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        self.lessons = [create_lesson(self.course, serial_number) for serial_number in (1, 2, 3)]
+        self.learner = CustomUser.objects.create_user(username='learner', email='learner@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.learner)
+        self.client.get(f'/api/courses/{self.course.id}/')
+        self.client.post(f'/api/lessons/{self.lessons[0].id}/start/')
+
+    def test_summary_has_callers_state_and_no_bodies(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/courses/{self.course.id}/lessons/')
+        self.assertEqual(len(queries), 3)
+        first, second = response.data[:2]
+        self.assertEqual(set(first), {'id', 'title', 'serial_number', 'max_score', 'component_count', 'score',
+                                      'is_completed'})
+        self.assertEqual((first['component_count'], first['score'], first['is_completed']), (5, 20, False))
+        self.assertEqual((second['score'], second['is_completed']), (None, False))
+
+    def test_fields_and_expand(self):
+        response = self.client.get(f'/api/courses/{self.course.id}/lessons/?fields=id,title')
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+        response = self.client.get(f'/api/courses/{self.course.id}/lessons/?expand=components&fields=id,components')
+        self.assertEqual(set(response.data[0]), {'id', 'components'})
+        self.assertEqual(len(response.data[0]['components']), 5)
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Python asoslari', complexity='junior',
+                                            description='Dasturlashga kirish', is_published=True)
+        self.lesson = create_lesson(self.course, 1)
+        Text.objects.filter(lesson=self.lesson).update(content='Recursion and generators')
+        self.draft = Course.objects.create(name='Python draft', complexity='junior', description='Hidden')
+        self.course.touch_content()
+        self.client = APIClient()
+
+    def results(self, query):
+        response = self.client.get('/api/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(result['kind'], result['course'], result['lesson']) for result in response.data['results']]
+
+    def test_finds_courses_and_lessons_by_content(self):
+        self.assertEqual(self.results('python'), [('course', self.course.id, None)])
+        self.assertEqual(self.results('recurs'), [('lesson', self.course.id, self.lesson.id)])
+        self.assertEqual(self.results('"*) OR'), [])
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+
+    def test_index_follows_content_writes(self):
+        Text.objects.filter(lesson=self.lesson).update(content='Decorators')
+        self.course.touch_content()
+        self.assertEqual(self.results('recursion'), [])
+        self.assertEqual(len(self.results('decorators')), 1)
+        self.lesson.delete()
+        self.course.touch_content()
+        self.assertEqual(self.results('decorators'), [])
+
+    def test_staff_also_see_unpublished_courses(self):
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='x', is_staff=True))
+        self.assertEqual(len(self.results('python')), 2)
+
+    def test_migration_indexes_existing_courses(self):
+        SearchEntry.objects.all().delete()
+        import_module('courses.migrations.0017_searchentry').populate_search_entries(apps, None)
+        self.assertEqual(self.results('recurs'), [('lesson', self.course.id, self.lesson.id)])
+        self.assertEqual(SearchEntry.objects.count(), 3)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL full-text search')
+class PostgresSearchTest(TestCase):
+    def test_ranks_titles_first_and_matches_last_token_as_prefix(self):
+        body_match = Course.objects.create(name='Intro', complexity='junior', description='Generators in depth',
+                                           is_published=True)
+        title_match = Course.objects.create(name='Generators', complexity='junior', description='Intro',
+                                            is_published=True)
+        self.assertEqual([entry.course_id for entry in search('generat')], [title_match.id, body_match.id])
+        self.assertEqual([entry.course_id for entry in search('generators in dep')], [body_match.id])
+        self.assertEqual(search("'&|!:*"), [])
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.course = Course.objects.create(name='Python', complexity='junior', description='Intro')
+        create_lesson(self.course, 1)
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='x', is_staff=True))
+
+    def test_records_per_route_latency_and_queries(self):
+        for _ in range(2):
+            self.client.get(f'/api/courses/{self.course.id}/lessons/?expand=components')
+        body = self.client.get('/metrics').content.decode()
+        labels = 'route="/api/courses/<int:course_id>/lessons/",method="GET"'
+        self.assertIn(f'ucode_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn(f'ucode_responses_total{{{labels},status="200"}} 2', body)
+        queries = next(line for line in body.splitlines() if line.startswith(f'ucode_request_queries_sum{{{labels}}}'))
+        self.assertGreater(float(queries.split()[-1]), 0)
+        self.assertIn('ucode_judge_cache_requests_total{result="hit"}', body)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+
+class BenchmarkTest(TestCase):
+    def test_seed_and_run(self):
+        call_command('seed_benchmark_data', courses=2, lessons=2, components=5, users=3, enrollments=2,
+                     stdout=StringIO())
+        self.assertEqual(Lesson.objects.count(), 4)
+        self.assertEqual(Component.objects.count(), 20)
+        with override_settings(RESPONSE_CACHE_TIMEOUT=60):
+            report = run_benchmarks(iterations=2, only=['courses_details', 'lessons_start', 'task_check_mcq',
+                                                        'courses_index'])
+        self.assertEqual({name: result['status'] for name, result in report['endpoints'].items()},
+                         {'courses_details': [200], 'lessons_start': [200], 'task_check_mcq': [200],
+                          'courses_index': [200]})
+        self.assertGreater(report['endpoints']['courses_index']['queries'], 0)
+        self.assertEqual(Lesson.objects.count(), 4)
+
+
+# Like ConcurrentApplyScoreTest: SQLite's shared in-memory test database fails concurrent writers at once
+@skipUnlessDBFeature('has_select_for_update')
+class GradingLoadTest(TransactionTestCase):
+    def test_all_submissions_are_graded(self):
+        report = run_load_test(submissions=6, concurrency=2, grading_threads=2, learners=3, tests=2, latency=0.05,
+                               jitter=0.05, seed=1, timeout=60)
+        self.assertEqual((report['submit']['accepted'], report['jobs']['done']), (6, 6))
+        self.assertEqual(report['judge']['completed'], 12)
+        self.assertFalse(Course.objects.exists())
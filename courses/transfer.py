@@ -0,0 +1,138 @@
+import json
+
+from django.db import transaction
+
+from api.serializers import ComponentPayloadSerializer
+from .builders import CHILD_FIELDS, CONTENT_PREFETCHES, OPTION_MODELS, insert_components
+from .loaders import load_component_children
+from .models import Course, Lesson, Component
+from .search import reindex_course
+
+# Bump when the line layout changes; import_course refuses versions it does not know
+FORMAT_VERSION = 1
+COURSE_FIELDS = ('name', 'complexity', 'description', 'banner_image', 'is_published')
+LESSON_FIELDS = ('title', 'serial_number', 'max_score', 'lesson_materials')
+CHUNK_SIZE = 500
+
+
+class TransferError(Exception):
+    pass
+
+
+def component_record(component, child):
+    record = {'kind': 'component', 'lesson': component.lesson_id, 'type': component.type,
+              'max_score': component.max_score, 'serial_number': component.serial_number}
+    for field in CHILD_FIELDS[component.type]:
+        record[field] = getattr(child, field)
+    if component.type in OPTION_MODELS:
+        record['options'] = [{'option': option.option, 'is_correct': option.is_correct}
+                             for option in child.options.all()]
+    elif component.type == 'coding':
+        record['tests'] = [{'input': test.input, 'output': test.output} for test in child.tests.all()]
+    return record
+
+
+def export_records(course):
+    """Yield the NDJSON records of a course tree: a header, every lesson, then every component.
+
+    Rows are streamed with iterator() and subtypes are loaded CHUNK_SIZE components at a time, so memory does
+    not grow with the size of the course.
+    """
+    yield {'kind': 'course', 'version': FORMAT_VERSION,
+           **Course.objects.filter(id=course.id).values(*COURSE_FIELDS).get()}
+    lessons = Lesson.objects.filter(course=course).order_by('serial_number', 'id')
+    for lesson in lessons.values('id', *LESSON_FIELDS).iterator(chunk_size=CHUNK_SIZE):
+        yield {'kind': 'lesson', 'ref': lesson.pop('id'), **lesson}
+
+    components = Component.objects.filter(lesson__course=course) \
+        .order_by('lesson__serial_number', 'lesson_id', 'serial_number', 'id')
+    chunk = []
+    for component in components.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(component)
+        if len(chunk) == CHUNK_SIZE:
+            yield from component_chunk(chunk)
+            chunk = []
+    yield from component_chunk(chunk)
+
+
+def component_chunk(components):
+    children = load_component_children(components, prefetches=CONTENT_PREFETCHES)
+    for component in components:
+        yield component_record(component, children[component.id])
+
+
+def export_course(course, stream):
+    count = 0
+    for record in export_records(course):
+        # default=str writes Cloudinary fields as their public id, which is what they accept back on import
+        stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        count += 1
+    return count
+
+
+def read_records(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            raise TransferError(f'Line {line_number}: invalid JSON ({e})')
+
+
+def create_lessons(lessons):
+    """Bulk insert {ref: unsaved Lesson} and return it with the lessons' ids set."""
+    Lesson.objects.bulk_create(lessons.values(), batch_size=CHUNK_SIZE)
+    return lessons
+
+
+def import_course(stream, name=None):
+    """Create a new course from export_course() output and return it.
+
+    Lessons are bulk inserted as they are read, and components are validated like lessons_create payloads and
+    bulk inserted one batch per lesson or CHUNK_SIZE components. Everything runs in one transaction, so a bad line leaves nothing behind.
+    """
+    records = read_records(stream)
+    line_number, header = next(records, (1, {}))
+    if header.get('kind') != 'course':
+        raise TransferError(f'Line {line_number}: expected a course header')
+    if header.get('version') != FORMAT_VERSION:
+        raise TransferError(f'Unsupported export version {header.get("version")!r}, expected {FORMAT_VERSION}')
+
+    with transaction.atomic():
+        fields = {field: header[field] for field in COURSE_FIELDS if field in header}
+        if name:
+            fields['name'] = name
+        course = Course.objects.create(**fields)
+        lessons, pending_lessons = {}, {}
+        batch_lesson, batch = None, []
+        for line_number, record in records:
+            kind = record.get('kind')
+            if kind == 'lesson':
+                pending_lessons[record['ref']] = Lesson(course=course,
+                                                        **{field: record.get(field) for field in LESSON_FIELDS})
+            elif kind == 'component':
+                if pending_lessons:
+                    lessons.update(create_lessons(pending_lessons))
+                    pending_lessons = {}
+                lesson = lessons.get(record.get('lesson'))
+                if lesson is None:
+                    raise TransferError(f'Line {line_number}: unknown lesson {record.get("lesson")!r}')
+                component = ComponentPayloadSerializer(data=record)
+                if not component.is_valid():
+                    raise TransferError(f'Line {line_number}: {component.errors}')
+                if lesson is not batch_lesson or len(batch) == CHUNK_SIZE:
+                    if batch:
+                        insert_components(batch_lesson, batch)
+                    batch_lesson, batch = lesson, []
+                batch.append(component.validated_data)
+            else:
+                raise TransferError(f'Line {line_number}: unknown record kind {kind!r}')
+        if pending_lessons:
+            create_lessons(pending_lessons)
+        if batch:
+            insert_components(batch_lesson, batch)
+        Course.objects.filter(id=course.id).recompute_aggregates()
+        reindex_course(course.id)
+    course.refresh_from_db()
+    return course
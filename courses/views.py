@@ -1,32 +1,90 @@
-import base64
-import json
+import hashlib
 import uuid
-from io import BytesIO
-import qrcode
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from weasyprint import HTML
 from django.conf import settings
-from django.db.models import Sum
-
-from .models import Course, Lesson, Component, MultipleChoiceQuestion, MultipleOptionsQuestion, Video, Text, \
-    MultipleChoiceOption, MultipleOptionsOption, Certificate, CodingQuestion, CodingTest
-from .utils import test_code
-from user.models import UserLesson, UserComponent, UserCourse
-from api.serializers import CourseSerializer, LessonSerializer, UserLessonSerializer, CertificateSerializer
-from api.decorators import staff_required
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Value, prefetch_related_objects
+from django.db.models.functions import Coalesce
+
+from .models import Course, Lesson, Component, MultipleOptionsOption, Certificate, GradingJob
+from .certificates import certificate_etag, certificate_last_modified, get_certificate_pdf
+from .builders import insert_components, patch_components
+from .grading import apply_score, rescore_lesson
+from .search import search
+from .judge.cache import cache_stats
+from user.models import UserLesson, UserCourse
+from api.serializers import CourseSerializer, CourseCatalogSerializer, LessonSerializer, UserLessonSerializer, \
+    UserCourseSerializer, CertificateSerializer, LessonPayloadSerializer, LessonPatchSerializer, \
+    LessonSummarySerializer, SearchResultSerializer, prefetch_lessons
+from api.cache import bump_cache_version
+from api.decorators import staff_required, cached_response
+from api.pagination import EnrollmentPagination, KeysetPagination
+
+
+def content_validators(course, user_course=None, variant=''):
+    """ETag and Last-Modified of a payload built from a course's content and the caller's own progress.
+
+    variant tells apart representations of the same data, e.g. the query string selecting fields. Every input
+    of the ETag also moves Last-Modified: content and aggregate writes stamp content_updated_at, and
+    time_since_creation changes once a day.
+    """
+    learner_stamp = user_course.updated_at.timestamp() if user_course is not None else 0
+    age_days = (timezone.now() - course.created_at).days
+    parts = [course.id, course.content_version, course.learner_count, age_days, learner_stamp]
+    if variant:
+        parts.append(hashlib.md5(variant.encode()).hexdigest()[:8])
+    etag = '"' + '-'.join(map(str, parts)) + '"'
+    day_stamp = (course.created_at + timedelta(days=age_days)).timestamp()
+    # Whole seconds, as sent in the header, so If-Modified-Since with that value matches
+    return etag, int(max(course.content_updated_at.timestamp(), learner_stamp, day_stamp))
+
+
+def lessons_data(request, lessons, user_course):
+    """Lesson summaries, or full lessons with ?expand=components; ?fields=a,b keeps only those fields."""
+    fields = request.query_params.get('fields')
+    fields = fields.split(',') if fields else None
+    if 'components' in request.query_params.get('expand', '').split(','):
+        return LessonSerializer(lessons, many=True, fields=fields, context={'learner': request.user}).data
+    lessons = lessons.annotate(component_count=Count('components'))
+    return LessonSummarySerializer(lessons, many=True, fields=fields, context={'user_course': user_course}).data
+
+
+def with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @api_view(['GET'])
+@cached_response('catalog')
 def courses_index(request):
-    courses = Course.objects.all().order_by('-created_at')
-    courses_serialized = CourseSerializer(courses, many=True)
-    return Response(courses_serialized.data)
+    courses = Course.objects.all()
+    complexity = request.query_params.get('complexity')
+    if complexity:
+        if complexity not in dict(Course.COMPLEXITY_CHOICES):
+            return Response({'message': 'Unknown complexity'}, status=status.HTTP_400_BAD_REQUEST)
+        courses = courses.filter(complexity=complexity)
+    if not request.user.is_staff:
+        courses = courses.filter(is_published=True)
+    elif request.query_params.get('is_published') in ('true', 'false'):
+        courses = courses.filter(is_published=request.query_params['is_published'] == 'true')
+    completed = UserCourse.objects.filter(course=OuterRef('pk'), is_completed=True).order_by().values('course')
+    courses = courses.annotate(completed_count=Coalesce(
+        Subquery(completed.annotate(total=Count('id')).values('total')), Value(0)))
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(courses, request)
+    return paginator.get_paginated_response(CourseCatalogSerializer(page, many=True).data)
 
 
 @api_view(['POST'])
@@ -35,6 +93,7 @@ def courses_create(request):
     course_serialized = CourseSerializer(data=request.data)
     if course_serialized.is_valid():
         course_serialized.save()
+        bump_cache_version('catalog')
         return Response(course_serialized.data)
     return Response(course_serialized.errors)
 
@@ -43,12 +102,27 @@ def courses_create(request):
 @permission_classes([IsAuthenticated])
 def courses_details(request, course_id):
     course = Course.objects.get(id=course_id)
-    if request.user not in course.learners.all():
-        course.learners.add(request.user)
+    user_course, enrolled = UserCourse.objects.get_or_create(user=request.user, course=course)
+    if enrolled:
+        course.update_aggregates(learner_count=1)
+    etag, last_modified = content_validators(course, user_course, request.META.get('QUERY_STRING', ''))
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+    prefetch_related_objects([course], Prefetch('usercourse_set',
+                                                queryset=UserCourse.objects.filter(user=request.user)))
     course_serialized = CourseSerializer(course)
-    lessons = course.lessons.all().order_by('serial_number')
-    lessons_serialized = LessonSerializer(lessons, many=True)
-    return Response({'course': course_serialized.data, 'lessons': lessons_serialized.data})
+    lessons = lessons_data(request, course.lessons.all().order_by('serial_number'), user_course)
+    return with_validators(Response({'course': course_serialized.data, 'lessons': lessons}), etag, last_modified)
+
+
+@api_view(['GET'])
+@staff_required
+def courses_enrollments(request, course_id):
+    enrollments = UserCourse.objects.filter(course_id=course_id).select_related('course').order_by('-enrolled_at', '-id')
+    paginator = EnrollmentPagination()
+    page = paginator.paginate_queryset(enrollments, request)
+    return paginator.get_paginated_response(UserCourseSerializer(page, many=True).data)
 
 
 @api_view(['DELETE'])
@@ -56,6 +130,7 @@ def courses_details(request, course_id):
 def courses_delete(request, course_id):
     course = Course.objects.get(id=course_id)
     course.delete()
+    bump_cache_version('catalog', 'statistics')
     return Response({'message': 'Kurs muvaffaqiyatli o`chirildi'})
 
 
@@ -70,6 +145,8 @@ def courses_update(request, course_id):
         course_serialized = CourseSerializer(course, data=request.data)
         if course_serialized.is_valid():
             course_serialized.save()
+            course.touch_content()
+            bump_cache_version('catalog', 'statistics')
             return Response(course_serialized.data)
         return Response(course_serialized.errors)
     return Response({'message': 'Method not allowed'})
@@ -81,6 +158,8 @@ def courses_publish(request, course_id):
     course = Course.objects.get(id=course_id)
     course.is_published = True
     course.save()
+    course.touch_content()
+    bump_cache_version('catalog', 'statistics')
     return Response({'message': 'Kurs nashr qilindi'})
 
 
@@ -90,18 +169,25 @@ def courses_unpublish(request, course_id):
     course = Course.objects.get(id=course_id)
     course.is_published = False
     course.save()
+    course.touch_content()
+    bump_cache_version('catalog', 'statistics')
     return Response({'message': 'Kurs arxivlandi'})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def lessons_details(request, lesson_id):
-    lesson = Lesson.objects.get(id=lesson_id)
-    lesson_serialized = LessonSerializer(lesson)
+    lesson = Lesson.objects.select_related('course').get(id=lesson_id)
     course = lesson.course
     user_course = UserCourse.objects.get(user=request.user, course=course)
+    etag, last_modified = content_validators(course, user_course)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+    children = prefetch_lessons([lesson], request.user)
+    lesson_serialized = LessonSerializer(lesson, context={'learner': request.user, 'component_children': children})
     is_vip = user_course.is_vip
-    return Response({'lesson': lesson_serialized.data, 'is_vip': is_vip})
+    return with_validators(Response({'lesson': lesson_serialized.data, 'is_vip': is_vip}), etag, last_modified)
 
 
 @api_view(['POST'])
@@ -109,13 +195,17 @@ def lessons_details(request, lesson_id):
 def lessons_start(request, lesson_id):
     if UserLesson.objects.filter(user=request.user, lesson=lesson_id).exists():
         return Response({'message': 'Lesson already started'})
-    lesson = Lesson.objects.get(id=lesson_id)
-    user_lesson = UserLesson(user=request.user, lesson=lesson)
-    user_lesson.score = sum(
+    lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+    score = sum(
         [component.max_score for component in lesson.components.all() if component.type in ['video', 'text']])
-    if user_lesson.score >= 80:
-        user_lesson.is_completed = True
-    user_lesson.save()
+    with transaction.atomic():
+        user_course = UserCourse.objects.select_for_update().filter(user=request.user, course=lesson.course).first()
+        _, created = UserLesson.objects.get_or_create(user=request.user, lesson=lesson,
+                                                      defaults={'score': score, 'is_completed': score >= 80})
+        if not created:
+            return Response({'message': 'Lesson already started'})
+        if user_course is not None:
+            user_course.record_lesson(lesson, score, score >= 80)
     return Response(
         {
             'message': 'Lesson started successfully',
@@ -139,137 +229,136 @@ def lessons_next(request, course_id, serial_number):
 @api_view(['DELETE'])
 @staff_required
 def lessons_delete(request, lesson_id):
-    course = Lesson.objects.get(id=lesson_id)
-    course.delete()
+    lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+    lesson.delete()
+    lesson.course.update_aggregates(total_score=-lesson.max_score, lesson_count=-1)
+    lesson.course.touch_content()
+    UserCourse.objects.filter(course=lesson.course).recompute_progress()
+    bump_cache_version('catalog')
     return Response({'message': 'Dars muvaffaqiyatli o`chirildi'})
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def task_check(request, component_id):
-    component = Component.objects.get(id=component_id)
-    user_lesson = UserLesson.objects.get(user=request.user, lesson=component.lesson)
-    course = component.lesson.course
-    user_course = UserCourse.objects.get(user=request.user, course=course)
-    has_user_component = UserComponent.objects.filter(user=request.user, component=component).exists()
+    component = Component.objects.select_related('lesson__course').get(id=component_id)
+    if 'answer' not in request.data:
+        return Response({'message': 'Answer is required'}, status=status.HTTP_400_BAD_REQUEST)
+    # Only answers to a lesson the learner started in a published course are graded
+    started = UserLesson.objects.filter(user=request.user, lesson_id=component.lesson_id).exists()
+    if not started or not (component.lesson.course.is_published or request.user.is_staff):
+        return Response({'message': 'Lesson not started'}, status=status.HTTP_404_NOT_FOUND)
+    if component.type == 'coding':
+        job = GradingJob.objects.create(user=request.user, component=component, source_code=request.data['answer'])
+        return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
     is_correct = False
-    if has_user_component:
-        user_component = UserComponent.objects.get(user=request.user, component=component)
-        user_lesson.score -= user_component.score
-    else:
-        user_component = UserComponent(user=request.user, component=component)
     if component.type == 'mcq':
-        if request.data['answer'] == 'true':
-            user_lesson.score += component.max_score
-            user_component.score = component.max_score
-            is_correct = True
-        else:
-            user_component.score = 0
+        is_correct = request.data['answer'] == 'true'
     elif component.type == 'moq':
-        moq_component = MultipleOptionsQuestion.objects.get(id=component_id)
-        answers = len([1 for option in moq_component.options.all() if option.is_correct])
+        answers = MultipleOptionsOption.objects.filter(question_id=component.id, is_correct=True).count()
         user_answer = request.data['answer']
-        if len(user_answer) == answers and 'false' not in user_answer:
-            user_lesson.score += component.max_score
-            user_component.score = component.max_score
-            is_correct = True
-        else:
-            user_component.score = 0
-    elif component.type == 'coding':
-        coding_question = CodingQuestion.objects.get(id=component_id)
-        tests = coding_question.tests.all()
-        language = coding_question.language
-        source_code = request.data['answer']
-        results = []
-        for test in tests:
-            test_result = test_code(source_code, test.input, test.output, language)
-            results.append(test_result)
-        if all(results):
-            user_lesson.score += component.max_score
-            user_component.score = component.max_score
-            is_correct = True
-        else:
-            user_component.score = 0
-    user_component.save()
-    if user_lesson.score >= 80:
-        user_lesson.is_completed = True
-        user_course.progress += component.lesson.max_score
-        total_score = course.lessons.aggregate(total_score=Sum('max_score'))['total_score']
-        if user_course.progress >= total_score:
-            user_course.is_completed = True
-        user_course.save()
-    elif user_lesson.is_completed:
-        user_course.progress -= component.lesson.max_score
-        user_lesson.is_completed = False
-        user_course.save()
-    else:
-        user_lesson.is_completed = False
-    user_lesson.save()
+        is_correct = len(user_answer) == answers and 'false' not in user_answer
+    apply_score(request.user, component, is_correct)
     return Response({'is_correct': is_correct})
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_check_status(request, job_id):
+    try:
+        job = GradingJob.objects.get(id=job_id, user=request.user)
+    except GradingJob.DoesNotExist:
+        return Response({'message': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'job_id': job.id, 'status': job.status, 'is_correct': job.is_correct})
+
+
+@api_view(['GET'])
+@staff_required
+def judge_stats(request):
+    return Response(cache_stats())
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def courses_lessons(request, course_id):
     course = Course.objects.get(id=course_id)
-    lessons = course.lessons.all().order_by('serial_number')
-    lessons_serialized = LessonSerializer(lessons, many=True)
-    return Response(lessons_serialized.data)
+    user_course = UserCourse.objects.filter(user=request.user, course=course).first()
+    etag, last_modified = content_validators(course, user_course, request.META.get('QUERY_STRING', ''))
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+    lessons = lessons_data(request, course.lessons.all().order_by('serial_number'), user_course)
+    return with_validators(Response(lessons), etag, last_modified)
 
 
 @api_view(['POST'])
 @staff_required
 def lessons_create(request):
-    if request.data.get('lessonId'):
+    lesson_data = LessonPayloadSerializer(data=request.data)
+    lesson_data.is_valid(raise_exception=True)
+    data = lesson_data.validated_data
+    course = data['course']
+    course_ids = {course.id}
+    with transaction.atomic():
+        if request.data.get('lessonId'):
+            try:
+                old_lesson = Lesson.objects.select_for_update().get(id=request.data['lessonId'])
+            except Lesson.DoesNotExist:
+                return Response({'message': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
+            old_lesson.delete()
+            old_course = course if old_lesson.course_id == course.id else old_lesson.course
+            old_course.update_aggregates(total_score=-old_lesson.max_score, lesson_count=-1)
+            if old_course is not course:
+                old_course.touch_content()
+            course_ids.add(old_course.id)
+        lesson = Lesson(course=course, serial_number=data['serial_number'], title=data['title'],
+                        max_score=data['max_score'])
+        if request.data.get('lesson_materials'):
+            lesson.lesson_materials = request.data['lesson_materials']
+        lesson.save()
+        insert_components(lesson, data['components'])
+        course.update_aggregates(total_score=lesson.max_score, lesson_count=1)
+        course.touch_content()
+        UserCourse.objects.filter(course_id__in=course_ids).recompute_progress()
+    bump_cache_version('catalog')
+    return Response({'message': 'Lesson created successfully'})
+
+
+@api_view(['PATCH'])
+@staff_required
+def lessons_patch(request, lesson_id):
+    with transaction.atomic():
         try:
-            lesson = Lesson.objects.get(id=request.data['lessonId'])
-            lesson.delete()
+            lesson = Lesson.objects.select_for_update().get(id=lesson_id)
         except Lesson.DoesNotExist:
             return Response({'message': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
-    data = request.data
-    course = Course.objects.get(id=data['course_id'])
-    lesson = Lesson(course=course, serial_number=data['serial_number'], title=data['title'],
-                    max_score=data['max_score'])
-    if data.get('lesson_materials'):
-        lesson.lesson_materials = data['lesson_materials']
-    lesson.save()
-    components = json.loads(data['components'])
-    for component in components:
-        if component['type'] == 'video':
-            video_component = Video(lesson=lesson, max_score=component['max_score'],
-                                    serial_number=component['serial_number'], video_url=component['video_url'])
-            video_component.save()
-        elif component['type'] == 'text':
-            text_component = Text(lesson=lesson, max_score=component['max_score'],
-                                  serial_number=component['serial_number'], content=component['content'])
-            text_component.save()
-        elif component['type'] == 'mcq':
-            mcq_component = MultipleChoiceQuestion(lesson=lesson, max_score=component['max_score'],
-                                                   serial_number=component['serial_number'],
-                                                   question=component['question'])
-            mcq_component.save()
-            for option in component['options']:
-                mcq_option = MultipleChoiceOption(question=mcq_component, is_correct=option['is_correct'],
-                                                  option=option['option'])
-                mcq_option.save()
-        elif component['type'] == 'moq':
-            moq_component = MultipleOptionsQuestion(lesson=lesson, max_score=component['max_score'],
-                                                    serial_number=component['serial_number'],
-                                                    question=component['question'])
-            moq_component.save()
-            for option in component['options']:
-                moq_option = MultipleOptionsOption(question=moq_component, is_correct=option['is_correct'],
-                                                   option=option['option'])
-                moq_option.save()
-        elif component['type'] == 'coding':
-            coding_question = CodingQuestion(lesson=lesson, max_score=component['max_score'],
-                                             serial_number=component['serial_number'], question=component['question'],
-                                             language=component['language'], pre_written_code=component['pre_written_code'])
-            coding_question.save()
-            for test in component['tests']:
-                coding_test = CodingTest(question=coding_question, input=test['input'], output=test['output'])
-                coding_test.save()
-    return Response({'message': 'Lesson created successfully'})
+        lesson_data = LessonPatchSerializer(data=request.data, partial=True, context={'lesson': lesson})
+        lesson_data.is_valid(raise_exception=True)
+        data = lesson_data.validated_data
+        score_delta = data.get('max_score', lesson.max_score) - lesson.max_score
+        updated_fields = [field for field in ('title', 'serial_number', 'max_score')
+                          if field in data and data[field] != getattr(lesson, field)]
+        for field in updated_fields:
+            setattr(lesson, field, data[field])
+        if request.data.get('lesson_materials'):
+            lesson.lesson_materials = request.data['lesson_materials']
+            updated_fields.append('lesson_materials')
+        if updated_fields:
+            lesson.save(update_fields=updated_fields)
+        changes = {'created': 0, 'updated': 0, 'deleted': 0}
+        if 'components' in data:
+            changes = patch_components(lesson, data['components'])
+        if not updated_fields and not any(changes.values()):
+            return Response({'message': 'Lesson updated successfully', **changes})
+        if score_delta:
+            lesson.course.update_aggregates(total_score=score_delta)
+        if any(changes.values()):
+            rescore_lesson(lesson)
+        if score_delta or any(changes.values()):
+            UserCourse.objects.filter(course_id=lesson.course_id).recompute_progress()
+        lesson.course.touch_content()
+    bump_cache_version('catalog')
+    return Response({'message': 'Lesson updated successfully', **changes})
 
 
 class GenerateCertificateView(APIView):
@@ -284,63 +373,47 @@ class GenerateCertificateView(APIView):
             if not user_course.is_completed:
                 return Response({'message': 'Kurs kugatilmagan'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if Certificate.objects.filter(student=user, course=course).exists():
-                certificate = Certificate.objects.get(student=user, course=course)
-                certificate_id = certificate.certificate_id
-            else:
-                certificate_id = str(uuid.uuid4())
-                certificate = Certificate.objects.create(
-                    student=user,
-                    course=course,
-                    certificate_id=certificate_id
-                )
-
-            serializer = CertificateSerializer(certificate)
-
-            verification_data = (f'Sertifikat {user.get_full_name()}ga {course.name} kursini muvaffaqiyatli yakunlaganu'
-                                 f' uchun {certificate.issue_date} sanasida berildi')
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(verification_data)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="darkblue", back_color="white")
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            qr_code_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-            context = {
-                'recipient_name': user.get_full_name() or user.username,
-                'course_name': course.name,
-                'issue_date': certificate.issue_date.strftime('%B %d, %Y'),
-                'certificate_id': certificate_id,
-                'qr_code': qr_code_base64,
-            }
-            html_string = render_to_string('certificate_template.html', context)
-
-            # Generate PDF, respecting the template's @page settings
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="mucode_certificate_{certificate.certificate_id}.pdf"'
-            HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf(
-                response,
-                stylesheets=[],
-                presentational_hints=True,
-                margin_left=0,
-                margin_right=0,
-                margin_top=0,
-                margin_bottom=0
+            certificate, _ = Certificate.objects.select_related('student', 'course').get_or_create(
+                student=user,
+                course=course,
+                defaults={'certificate_id': str(uuid.uuid4())}
             )
 
-            return response
+            etag = certificate_etag(certificate)
+            last_modified = certificate_last_modified(certificate)
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            path = get_certificate_pdf(certificate, request.build_absolute_uri('/'))
+            response = FileResponse(default_storage.open(path, 'rb'),
+                                    content_type='application/pdf', as_attachment=True,
+                                    filename=f'mucode_certificate_{certificate.certificate_id}.pdf')
+            return with_validators(response, etag, last_modified)
         except Course.DoesNotExist:
             return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
         except UserCourse.DoesNotExist:
             return Response({'message': 'User course not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+def courses_search(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'message': 'Query is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 50)
+    except ValueError:
+        return Response({'message': 'Invalid page'}, status=status.HTTP_400_BAD_REQUEST)
+    results = search(query, published_only=not request.user.is_staff, limit=page_size + 1,
+                     offset=(page - 1) * page_size)
+    return Response({
+        'next': page + 1 if len(results) > page_size else None,
+        'results': SearchResultSerializer(results[:page_size], many=True).data,
+    })
+
+
 @api_view(['GET'])
 def verify_certificate(request, certificate_id):
     try:
@@ -8,7 +8,8 @@ from datetime import timedelta
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-BASE_URL = 'https://web-production-d4808.up.railway.app'
+# Resolves relative URLs in rendered certificates when there is no request to take the host from
+BASE_URL = config('BASE_URL', default='https://web-production-d4808.up.railway.app')
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -151,6 +153,45 @@ cloudinary.config(
     secure=True
 )
 
+# Judge results are keyed by content, so a bounded per-worker cache is safe; replace the 'judge'
+# backend with a shared one (e.g. Redis) to reuse results and hit/miss counters across workers.
+JUDGE_CACHE_ENABLED = config('JUDGE_CACHE_ENABLED', default=True, cast=bool)
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    'judge': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'judge',
+        'TIMEOUT': config('JUDGE_CACHE_TTL', default=60 * 60 * 24, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('JUDGE_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    },
+}
+
+# Catalog and statistics responses are invalidated through version keys in the default cache, which only
+# works across workers when CACHE_BACKEND is shared (e.g. Redis). Off by default; a system check refuses a
+# positive value with the per-process LocMemCache outside DEBUG.
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=0, cast=int)
+
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+
+CODE_EXECUTOR = config('CODE_EXECUTOR', default='judge0')
+LOCAL_EXECUTOR_TIME_LIMIT = config('LOCAL_EXECUTOR_TIME_LIMIT', default=2, cast=int)
+LOCAL_EXECUTOR_MEMORY_LIMIT = config('LOCAL_EXECUTOR_MEMORY_LIMIT', default=256, cast=int)
+LOCAL_EXECUTOR_MAX_PROCESSES = config('LOCAL_EXECUTOR_MAX_PROCESSES', default=512, cast=int)
+# The local executor is for development only (it requires DEBUG); name an unprivileged user here to run
+# submissions as that user instead of the one running Django
+LOCAL_EXECUTOR_USER = config('LOCAL_EXECUTOR_USER', default='')
+JUDGE0_URL = config('JUDGE0_URL', default='https://judge0-ce.p.rapidapi.com')
+# RapidAPI key for the hosted judge; leave empty for a self-hosted Judge0 and clear JUDGE0_HOST as well
+JUDGE0_API_KEY = config('JUDGE0_API_KEY', default='')
+JUDGE0_HOST = config('JUDGE0_HOST', default='judge0-ce.p.rapidapi.com')
+JUDGE0_TIMEOUT = config('JUDGE0_TIMEOUT', default=30, cast=int)
+
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.RawMediaCloudinaryStorage'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
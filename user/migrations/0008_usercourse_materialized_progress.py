@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:57
+
+from django.db import migrations, models
+from django.db.models import Case, When, Value, Sum, F, OuterRef, Subquery, CharField, JSONField
+from django.db.models.functions import Cast, Coalesce, Least
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+
+from user.models import JSONArrayAgg, JSONObjectAgg
+
+
+def populate_progress(apps, schema_editor):
+    # Mirrors UserCourseQuerySet.recompute_progress(), which historical models do not have
+    Course = apps.get_model('courses', 'Course')
+    UserCourse = apps.get_model('user', 'UserCourse')
+    UserLesson = apps.get_model('user', 'UserLesson')
+    user_lessons = UserLesson.objects.filter(
+        user=OuterRef('user'), lesson__course=OuterRef('course')).order_by().values('user')
+    completed = user_lessons.filter(is_completed=True)
+    progress = Coalesce(Subquery(completed.annotate(total=Sum('lesson__max_score')).values('total')), Value(0))
+    total_score = Subquery(Course.objects.filter(id=OuterRef('course')).values('total_score'))
+    UserCourse.objects.update(
+        progress=progress,
+        lesson_scores=Coalesce(
+            Subquery(user_lessons.annotate(
+                scores=JSONObjectAgg(Cast('lesson_id', CharField()), 'score')).values('scores')),
+            Value({}, output_field=JSONField())),
+        completed_lessons=Coalesce(
+            Subquery(completed.annotate(ids=JSONArrayAgg('lesson_id')).values('ids')),
+            Value([], output_field=JSONField())),
+        percentage=Case(When(GreaterThan(total_score, 0), then=Least(progress * 100 / total_score, Value(100))),
+                        default=Value(0)),
+        is_completed=Case(When(GreaterThan(total_score, 0) & GreaterThanOrEqual(progress, total_score),
+                               then=Value(True)), default=F('is_completed')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0007_usercourse_is_vip'),
+        ('courses', '0012_course_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourse',
+            name='completed_lessons',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='usercourse',
+            name='lesson_scores',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='usercourse',
+            name='percentage',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:00
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Duplicate rows to keep: the enrollment with the most progress and the attempt with the best score
+DUPLICATES = (
+    ('UserCourse', 'course', ('-progress', 'id')),
+    ('UserLesson', 'lesson', ('-score', 'id')),
+    ('UserComponent', 'component', ('-score', 'id')),
+)
+
+
+def remove_duplicates(apps, schema_editor):
+    for model_name, field, ordering in DUPLICATES:
+        model = apps.get_model('user', model_name)
+        groups = model.objects.values('user', field).annotate(rows=Count('id')).filter(rows__gt=1)
+        for group in groups:
+            ids = list(model.objects.filter(user=group['user'], **{field: group[field]})
+                       .order_by(*ordering).values_list('id', flat=True))
+            model.objects.filter(id__in=ids[1:]).delete()
+
+    # courses 0012 and user 0008 counted the duplicates; recount learners and progress without them
+    Course = apps.get_model('courses', 'Course')
+    UserCourse = apps.get_model('user', 'UserCourse')
+    learners = UserCourse.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    Course.objects.update(
+        learner_count=Coalesce(Subquery(learners.annotate(total=Count('id')).values('total')), Value(0)))
+    import_module('user.migrations.0008_usercourse_materialized_progress').populate_progress(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_gradingjob'),
+        ('user', '0008_usercourse_materialized_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usercomponent',
+            constraint=models.UniqueConstraint(fields=('user', 'component'), name='unique_user_component'),
+        ),
+        migrations.AddConstraint(
+            model_name='usercourse',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='unique_user_course'),
+        ),
+        migrations.AddConstraint(
+            model_name='userlesson',
+            constraint=models.UniqueConstraint(fields=('user', 'lesson'), name='unique_user_lesson'),
+        ),
+    ]
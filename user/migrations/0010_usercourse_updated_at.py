@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_unique_enrollments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercourse',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Aggregate, Case, When, Value, Sum, F, OuterRef, Subquery, Exists, CharField, JSONField
+from django.db.models.functions import Cast, Coalesce, Least, Now
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 from cloudinary.models import CloudinaryField
 
 
@@ -13,6 +16,56 @@ class CustomUser(AbstractUser):
         return self.username
 
 
+class JSONObjectAgg(Aggregate):
+    function = 'JSON_GROUP_OBJECT'
+    output_field = JSONField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function='JSONB_OBJECT_AGG', **extra_context)
+
+
+class JSONArrayAgg(Aggregate):
+    function = 'JSON_GROUP_ARRAY'
+    output_field = JSONField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function='JSONB_AGG', **extra_context)
+
+
+class UserCourseQuerySet(models.QuerySet):
+    def with_next_lesson(self):
+        """Annotate next_lesson_id: the learner's first lesson of the course, by serial number, not completed yet."""
+        from courses.models import Lesson
+
+        completed = UserLesson.objects.filter(user=OuterRef(OuterRef('user')), lesson=OuterRef('pk'), is_completed=True)
+        next_lessons = Lesson.objects.filter(course=OuterRef('course')).exclude(Exists(completed))
+        return self.annotate(next_lesson_id=Subquery(next_lessons.order_by('serial_number', 'id').values('id')[:1]))
+
+    def recompute_progress(self):
+        from courses.models import Course
+
+        user_lessons = UserLesson.objects.filter(
+            user=OuterRef('user'), lesson__course=OuterRef('course')).order_by().values('user')
+        completed = user_lessons.filter(is_completed=True)
+        progress = Coalesce(Subquery(completed.annotate(total=Sum('lesson__max_score')).values('total')), Value(0))
+        total_score = Subquery(Course.objects.filter(id=OuterRef('course')).values('total_score'))
+        return self.update(
+            progress=progress,
+            lesson_scores=Coalesce(
+                Subquery(user_lessons.annotate(
+                    scores=JSONObjectAgg(Cast('lesson_id', CharField()), 'score')).values('scores')),
+                Value({}, output_field=JSONField())),
+            completed_lessons=Coalesce(
+                Subquery(completed.annotate(ids=JSONArrayAgg('lesson_id')).values('ids')),
+                Value([], output_field=JSONField())),
+            percentage=Case(When(GreaterThan(total_score, 0), then=Least(progress * 100 / total_score, Value(100))),
+                            default=Value(0)),
+            is_completed=Case(When(GreaterThan(total_score, 0) & GreaterThanOrEqual(progress, total_score),
+                                   then=Value(True)), default=F('is_completed')),
+            updated_at=Now(),
+        )
+
+
 class UserCourse(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     course = models.ForeignKey('courses.Course', on_delete=models.CASCADE)
@@ -20,10 +73,39 @@ class UserCourse(models.Model):
     progress = models.PositiveIntegerField(default=0)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     is_vip = models.BooleanField(default=False)
+    lesson_scores = models.JSONField(default=dict, blank=True)
+    completed_lessons = models.JSONField(default=list, blank=True)
+    percentage = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UserCourseQuerySet.as_manager()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'course'], name='unique_user_course')]
 
     def __str__(self):
         return f'{self.user.username} - {self.course.name}'
 
+    def record_lesson(self, lesson, score, is_completed):
+        """Fold one lesson's score into the materialized progress; the row must be locked by the caller."""
+        lesson_scores = dict(self.lesson_scores, **{str(lesson.id): score})
+        completed_lessons = set(self.completed_lessons)
+        progress = self.progress
+        if is_completed and lesson.id not in completed_lessons:
+            completed_lessons.add(lesson.id)
+            progress += lesson.max_score
+        elif not is_completed and lesson.id in completed_lessons:
+            completed_lessons.discard(lesson.id)
+            progress = max(progress - lesson.max_score, 0)
+        total_score = lesson.course.total_score
+        self.lesson_scores = lesson_scores
+        self.completed_lessons = sorted(completed_lessons)
+        self.progress = progress
+        self.percentage = min(progress * 100 // total_score, 100) if total_score else 0
+        self.is_completed = self.is_completed or (total_score > 0 and progress >= total_score)
+        self.save(update_fields=['lesson_scores', 'completed_lessons', 'progress', 'percentage', 'is_completed',
+                                 'updated_at'])
+
 
 class UserLesson(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -31,6 +113,9 @@ class UserLesson(models.Model):
     is_completed = models.BooleanField(default=False)
     score = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'lesson'], name='unique_user_lesson')]
+
     def __str__(self):
         return f'{self.user.username} - {self.lesson.title}'
 
@@ -40,6 +125,9 @@ class UserComponent(models.Model):
     component = models.ForeignKey('courses.Component', on_delete=models.CASCADE)
     score = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'component'], name='unique_user_component')]
+
 
 class UserAnswer(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -1,3 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from courses.models import Course, Certificate, Lesson, SiteStatistics
+from .models import CustomUser, UserCourse, UserLesson
+
+
+class StatisticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_counters_follow_writes(self):
+        user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro', is_published=True)
+        Course.objects.create(name='Draft', complexity='junior', description='Draft')
+        Certificate.objects.create(student=user, course=course, certificate_id='abc')
+        self.assertEqual(self.client.get('/api/statistics/').data,
+                         {'courses_count': 1, 'users_count': 1, 'certificates_count': 1})
+        course.is_published = False
+        course.save()
+        user.delete()
+        self.assertEqual(self.client.get('/api/statistics/').data,
+                         {'courses_count': 0, 'users_count': 0, 'certificates_count': 0})
+
+    def test_saves_without_publish_change_skip_counter(self):
+        course = Course.objects.create(name='Python', complexity='junior', description='Intro', is_published=True)
+        SiteStatistics.reconcile()
+        course.name = 'Python 3'
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+            course.save(update_fields=['name'])
+        self.assertFalse([query for query in queries if 'sitestatistics' in query['sql']])
+        course.is_published = False
+        course.save(update_fields=['is_published'])
+        self.assertEqual(SiteStatistics.objects.get().courses_count, 0)
+
+    def test_endpoint_reads_one_row(self):
+        SiteStatistics.reconcile()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/statistics/')
+        self.assertEqual(len(queries), 1)
+
+
+class EnrolledDashboardTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='student', email='student@example.com', password='x')
+        self.other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def enroll(self, name, completed_serials):
+        course = Course.objects.create(name=name, complexity='junior', description='Intro', total_score=200)
+        lessons = [Lesson.objects.create(course=course, title=f'Lesson {n}', max_score=100, serial_number=n)
+                   for n in (1, 2)]
+        for user in (self.user, self.other):
+            UserCourse.objects.create(user=user, course=course, progress=100 * len(completed_serials))
+        for lesson in lessons:
+            if lesson.serial_number in completed_serials:
+                UserLesson.objects.create(user=self.user, lesson=lesson, score=100, is_completed=True)
+            UserLesson.objects.create(user=self.other, lesson=lesson, score=100, is_completed=True)
+        return course, lessons
+
+    def test_one_query_with_callers_state(self):
+        python, python_lessons = self.enroll('Python', [1])
+        java, _ = self.enroll('Java', [1, 2])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/courses/enrolled/')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(sorted(response.data['enrolled_courses_ids']), sorted([python.id, java.id]))
+        courses = {course['id']: course for course in response.data['enrolled_courses']}
+        self.assertEqual((courses[python.id]['progress'], courses[python.id]['next_lesson_id']),
+                         (100, python_lessons[1].id))
+        self.assertIsNone(courses[java.id]['next_lesson_id'])
+        self.assertEqual(courses[java.id]['total_score'], 200)
+        self.assertNotIn('user_courses', courses[java.id])
@@ -6,9 +6,11 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 import cloudinary.uploader
-from api.serializers import SignupSerializer, CustomTokenObtainPairSerializer, CourseSerializer, GoogleAuthSerializer
-from .models import CustomUser
-from courses.models import Course, Certificate
+from api.serializers import SignupSerializer, CustomTokenObtainPairSerializer, EnrolledCourseSerializer, \
+    GoogleAuthSerializer
+from api.decorators import cached_response
+from .models import CustomUser, UserCourse
+from courses.models import SiteStatistics
 
 
 class GoogleAuthView(generics.CreateAPIView):
@@ -49,9 +51,10 @@ class LogoutView(APIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_courses(request):
-    courses = request.user.courses.all()
-    course_ids = [course.id for course in courses]
-    courses_serialized = CourseSerializer(courses, many=True)
+    enrollments = list(UserCourse.objects.filter(user=request.user).select_related('course').with_next_lesson()
+                       .order_by('-enrolled_at', '-id'))
+    course_ids = [enrollment.course_id for enrollment in enrollments]
+    courses_serialized = EnrolledCourseSerializer(enrollments, many=True)
     return Response({'enrolled_courses_ids': course_ids, 'enrolled_courses': courses_serialized.data})
 
 
@@ -78,9 +81,11 @@ def user_update(request):
 
 
 @api_view(['GET'])
+@cached_response('statistics')
 def statistics(request):
-    courses_count = Course.objects.filter(is_published=True).count()
-    users_count = CustomUser.objects.count()
-    certificates_count = Certificate.objects.count()
-    return Response(
-        {'courses_count': courses_count, 'users_count': users_count, 'certificates_count': certificates_count})
+    site_statistics = SiteStatistics.current()
+    return Response({
+        'courses_count': site_statistics.courses_count,
+        'users_count': site_statistics.users_count,
+        'certificates_count': site_statistics.certificates_count,
+    })